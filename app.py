@@ -1,23 +1,45 @@
 import os
 import logging
+import tempfile
 import time
-from flask import Flask, render_template, request, jsonify, redirect, url_for, flash, session
-from flask_sqlalchemy import SQLAlchemy
+import json
+from concurrent.futures import FIRST_COMPLETED, wait
+from flask import (
+    Flask, Response, render_template, request, jsonify, redirect, url_for, flash, session,
+    send_file, abort, stream_with_context
+)
+from cache import SearchCache
+from database import LazySQLAlchemy
+from history import InvalidCursor, history_page, stream_history
+from local_index import LocalIndex
+from thumbnails import THUMBNAIL_NAME_RE, ThumbnailStore, rewrite_image_results, verify_url
+from logging_config import configure_logging
+from query_normalizer import NormalizationStats, clean_query, normalize_query
 from search_engine import (
     search_all_engines, 
     get_available_engines, 
     search_all_image_engines,
-    get_available_image_engines
+    get_available_image_engines,
+    get_batch_executor,
+    tag_categories,
+    merge_engine_results,
+    submit_engine_searches,
+    BATCH_WORKERS,
+    ENGINE_TIMEOUT
 )
 
 # Set up logging
-logging.basicConfig(level=logging.DEBUG)
+configure_logging()
 logger = logging.getLogger(__name__)
 
 # Create Flask app
 app = Flask(__name__)
 app.secret_key = os.environ.get("SESSION_SECRET", "dev_secret_key")
 
+# Key that signs thumbnail proxy URLs. The default session key above is
+# public, so without SESSION_SECRET the proxy is off rather than open.
+thumbnail_secret = os.environ.get("SESSION_SECRET")
+
 # Configure the database
 db_user = os.environ.get("PGUSER")
 db_password = os.environ.get("PGPASSWORD")
@@ -25,8 +47,8 @@ db_host = os.environ.get("PGHOST")
 db_port = os.environ.get("PGPORT")
 db_name = os.environ.get("PGDATABASE")
 
-# Build the database URL
-database_url = f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
+# Build the database URL (DATABASE_URL, e.g. a local SQLite file, takes precedence)
+database_url = os.environ.get("DATABASE_URL") or f"postgresql://{db_user}:{db_password}@{db_host}:{db_port}/{db_name}"
 app.config["SQLALCHEMY_DATABASE_URI"] = database_url
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
 app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
@@ -34,19 +56,197 @@ app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
     "pool_pre_ping": True,
 }
 
-# Initialize the database
-db = SQLAlchemy(app)
+# Initialize the database (the engine itself is created on first use)
+db = LazySQLAlchemy(app)
 
 # Make the model circular import work
 import models
 
-# Create tables
-with app.app_context():
-    db.create_all()
+# Indexes behind the admin history browser: keyset pagination on
+# (timestamp, id) and the query-prefix and IP filters. init_db.py creates
+# them on existing tables.
+history_indexes = [
+    db.Index('ix_search_history_timestamp_id', models.SearchHistory.timestamp, models.SearchHistory.id),
+    db.Index('ix_search_history_query_prefix', models.SearchHistory.query,
+             postgresql_ops={'query': 'text_pattern_ops'}),
+    db.Index('ix_search_history_ip_timestamp', models.SearchHistory.ip_address, models.SearchHistory.timestamp),
+]
+
+# Schema creation runs out of band (see init_db.py) so cold starts don't
+# round-trip to the database; AUTO_CREATE_TABLES=1 keeps the old behaviour
+# for local development.
+if os.environ.get("AUTO_CREATE_TABLES") == "1":
+    with app.app_context():
+        db.create_all()
+
+# In-memory cache for search results. Entries older than CACHE_SOFT_TTL are
+# served stale while a background refresh runs; after CACHE_HARD_TTL they expire.
+search_cache = SearchCache(
+    soft_ttl=int(os.environ.get("CACHE_SOFT_TTL", 300)),
+    hard_ttl=int(os.environ.get("CACHE_HARD_TTL", 3600)),
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", 100)),
+)
+# Seconds a response missing rate-limited engines is served before it is refreshed
+CACHE_PARTIAL_TTL = int(os.environ.get("CACHE_PARTIAL_TTL", 60))
+
+# Counts cache hits that only happened because queries are normalized
+normalization_stats = NormalizationStats(max_keys=search_cache.max_entries * 10)
+
+# Restore the cache from the last snapshot (written by other workers, a previous
+# deploy or warm_cache.py) and keep snapshotting it; an empty path disables this
+cache_snapshot_path = os.environ.get(
+    "CACHE_SNAPSHOT_PATH", os.path.join(tempfile.gettempdir(), "colossus-cache.snapshot")
+)
+if cache_snapshot_path:
+    try:
+        restored = search_cache.load(cache_snapshot_path)
+        logger.info("Restored %d cached result pages from %s", restored, cache_snapshot_path)
+    except OSError as e:
+        logger.error("Failed to load cache snapshot %s: %s", cache_snapshot_path, e)
+    search_cache.start_snapshots(cache_snapshot_path, int(os.environ.get("CACHE_SNAPSHOT_INTERVAL", 300)))
+
+
+# Full-text index of every web result we have fetched, used for instant
+# answers and as a fallback when all engines fail
+local_index = LocalIndex(
+    os.environ.get("LOCAL_INDEX_PATH", os.path.join(tempfile.gettempdir(), "colossus-index.sqlite3")),
+    enabled=os.environ.get("LOCAL_INDEX_ENABLED", "1") == "1",
+    max_rows=int(os.environ.get("LOCAL_INDEX_MAX_ROWS", 100000)),
+    max_age=int(os.environ.get("LOCAL_INDEX_MAX_AGE_DAYS", 30)) * 24 * 3600,
+)
+
+
+# Disk cache behind the thumbnail proxy; THUMBNAIL_MAX_DIMENSION > 0 re-encodes
+# thumbnails to at most that many pixels per side (needs Pillow)
+thumbnail_store = ThumbnailStore(
+    os.environ.get("THUMBNAIL_CACHE_DIR", os.path.join(tempfile.gettempdir(), "colossus-thumbnails")),
+    max_bytes=int(os.environ.get("THUMBNAIL_CACHE_MAX_MB", 256)) * 1024 * 1024,
+    max_dimension=int(os.environ.get("THUMBNAIL_MAX_DIMENSION", 0)),
+)
+
+# Rows per page in the admin history browser
+HISTORY_PAGE_SIZE = 50
+
+# Most queries accepted by one /api/search/batch request
+BATCH_MAX_QUERIES = int(os.environ.get("BATCH_MAX_QUERIES", 20))
+
+# Browser cache lifetime of proxied thumbnails; engines do not reuse thumbnail URLs for other images
+THUMBNAIL_MAX_AGE = 365 * 24 * 3600
+
+
+def has_results(results):
+    """Return True if at least one engine answered with results"""
+    return bool(results.get('count')) and bool(results['engines']['successful'])
+
+
+def cacheable(results):
+    """Return results if they are complete enough to cache, else None"""
+    if results['engines']['throttled'] or results.get('degraded') or not has_results(results):
+        return None
+    return results
+
+
+def store_results(cache_key, results):
+    """Cache a search response
+
+    Complete responses are cached normally. Responses missing engines that
+    were over their rate limit are cached for CACHE_PARTIAL_TTL, so repeats
+    of a popular query don't fan out to the remaining engines again, but
+    never in place of a complete entry that is still being served stale.
+    Responses without results from any engine (every engine throttled or
+    failed) and local-index fallbacks are not cached.
+    """
+    if results.get('degraded') or not has_results(results):
+        return
+    if not results['engines']['throttled']:
+        search_cache.set(cache_key, results)
+        return
+    existing, _ = search_cache.get(cache_key)
+    if existing is None or existing['engines']['throttled']:
+        search_cache.set(cache_key, results, soft_ttl=CACHE_PARTIAL_TTL)
 
-# In-memory cache for search results
-# Format: {query: {'results': [...], 'timestamp': time.time()}}
-search_cache = {}
+
+def run_image_search(query, page):
+    """Search the image engines and take their thumbnails out of the results
+
+    The inline thumbnails are kept under 'inline_thumbnails' so cached
+    responses can refill /thumbnail/<name>; image_response() leaves them out
+    of what clients see.
+    """
+    results = search_all_image_engines(query, page=page)
+    results['inline_thumbnails'] = rewrite_image_results(
+        results['images'], thumbnail_store, thumbnail_secret, query, page
+    )
+    return results
+
+
+def image_response(results, raw_query):
+    """Return the client-facing part of an image search response"""
+    response = dict(results, query=raw_query)
+    response.pop('inline_thumbnails', None)
+    return response
+
+
+def image_cache_key(query, page):
+    """Return the search_cache key for a page of image results"""
+    return f"img:{query}:{page}"
+
+
+def refill_thumbnail(name, raw_query, page):
+    """Recreate an inline thumbnail this instance does not have, returning its path
+
+    The data comes from the cached image response it was taken from, or if
+    that is gone, from running the image search again.
+    """
+    query = normalize_query(raw_query)
+    if not query or not THUMBNAIL_NAME_RE.match(name):
+        return None
+    cache_key = image_cache_key(query, page)
+    cached, _ = search_cache.get(cache_key)
+    if cached is None:
+        cached = run_image_search(clean_query(raw_query), page)
+        store_results(cache_key, cached)
+    uri = cached.get('inline_thumbnails', {}).get(name)
+    if uri is None:
+        return None
+    return thumbnail_store.get(thumbnail_store.put_data_uri(uri) or '')
+
+
+def web_cache_key(query, engines, page):
+    """Return the search_cache key for a page of web results"""
+    return f"{query}:{','.join(sorted(engines))}:{page}"
+
+
+def cache_lookup(cache_key, raw_query):
+    """Look up a cache key, counting the lookup in normalization_stats"""
+    cached, stale = search_cache.get(cache_key)
+    normalization_stats.record(cache_key, raw_query, cached is not None)
+    return cached, stale
+
+
+def run_web_search(query, engines, page):
+    """Search the engines and index the merged results, falling back to the local index"""
+    return complete_web_search(search_all_engines(query, engines, page), page)
+
+
+def complete_web_search(results, page):
+    """Index a merged web response, or fill it from the local index if every engine failed"""
+    query = results['query']
+    if results['results']:
+        local_index.add(results['results'])
+        return results
+
+    local_results = local_index.search(query, limit=10, offset=(page - 1) * 10)
+    if local_results:
+        logger.warning("All engines failed for '%s', serving %d local results", query, len(local_results))
+        results.update(
+            results=local_results,
+            all_results=local_results,
+            count=len(local_results),
+            categories=tag_categories(local_results),
+            degraded=True
+        )
+    return results
 
 @app.route('/')
 def index():
@@ -58,27 +258,28 @@ def index():
 def search():
     """Handle search requests and render results page"""
     query = request.args.get('q', '')
+    normalized_query = normalize_query(query)
     page = request.args.get('page', 1, type=int)
     
     # Get selected engines from query params or use all available
     engines = request.args.getlist('engines') or get_available_engines()
     
-    if not query:
+    if not normalized_query:
         return render_template('index.html', engines=get_available_engines())
     
-    # Record this search in the database
+    # Record this search in the database, normalized so variants of a query aggregate together
     try:
         search_record = models.SearchHistory(
-            query=query,
+            query=normalized_query,
             ip_address=request.remote_addr,
             user_agent=request.user_agent.string,
             engines=','.join(engines) if engines else None
         )
         db.session.add(search_record)
         db.session.commit()
-        logger.debug(f"Recorded search: '{query}'")
+        logger.debug("Recorded search: '%s'", query)
     except Exception as e:
-        logger.error(f"Failed to record search: {str(e)}")
+        logger.error("Failed to record search: %s", e)
         db.session.rollback()
     
     # Render the results page (actual results will be loaded via AJAX)
@@ -91,7 +292,9 @@ def search():
 @app.route('/api/search')
 def api_search():
     """API endpoint to get search results"""
-    query = request.args.get('q', '')
+    raw_query = request.args.get('q', '')
+    query = normalize_query(raw_query)
+    search_query = clean_query(raw_query)
     page = request.args.get('page', 1, type=int)
     
     # Get selected engines from query params or use all available
@@ -101,14 +304,17 @@ def api_search():
         return jsonify({'error': 'No query provided'}), 400
     
     try:
-        # Check cache first
-        cache_key = f"{query}:{','.join(sorted(engines))}:{page}"
-        if cache_key in search_cache:
-            logger.debug(f"Returning cached results for '{query}'")
-            return jsonify(search_cache[cache_key])
+        # Check cache first, refreshing stale entries in the background
+        cache_key = web_cache_key(query, engines, page)
+        cached, stale = cache_lookup(cache_key, raw_query)
+        if cached is not None:
+            if stale:
+                search_cache.refresh(cache_key, lambda: store_results(cache_key, run_web_search(search_query, engines, page)))
+            logger.debug("Returning %s cached results for '%s'", 'stale' if stale else 'fresh', query)
+            return jsonify(dict(cached, query=raw_query))
         
         # If not in cache, perform the search
-        results = search_all_engines(query, engines, page)
+        results = run_web_search(search_query, engines, page)
         
         # Update search history with results count if we have any results
         if 'web_results' in results and results['web_results']:
@@ -123,25 +329,149 @@ def api_search():
                     recent_search.results_count = len(results['web_results'])
                     db.session.commit()
             except Exception as e:
-                logger.error(f"Failed to update results count: {str(e)}")
+                logger.error("Failed to update results count: %s", e)
                 db.session.rollback()
                 
-        # Cache the results
-        search_cache[cache_key] = results
-        
-        # Clean up cache if it gets too large (simple strategy)
-        if len(search_cache) > 100:
-            # Just remove the oldest entries (first 20)
-            keys_to_remove = list(search_cache.keys())[:20]
-            for key in keys_to_remove:
-                search_cache.pop(key, None)
+        # Cache the results (briefly if rate limiting left some engines out)
+        store_results(cache_key, results)
                 
-        return jsonify(results)
+        return jsonify(dict(results, query=raw_query))
     
     except Exception as e:
-        logger.error(f"Error searching for '{query}': {str(e)}")
+        logger.error("Error searching for '%s': %s", query, e)
         return jsonify({'error': str(e)}), 500
 
+def parse_batch(payload):
+    """Validate a batch search body into a list of (query, engines, page)
+
+    Each entry of "queries" is a query string or an object with "q" and
+    optionally its own "engines" and "page"; the top-level "engines" and
+    "page" are the defaults. Engines must be known web engines; repeats are
+    dropped. Raises ValueError describing the problem.
+    """
+    available = get_available_engines()
+
+    if not isinstance(payload, dict) or not isinstance(payload.get('queries'), list):
+        raise ValueError('Expected a JSON object with a "queries" list')
+    if not payload['queries']:
+        raise ValueError('No queries provided')
+    if len(payload['queries']) > BATCH_MAX_QUERIES:
+        raise ValueError(f'At most {BATCH_MAX_QUERIES} queries per batch')
+
+    def options(item, default_engines, default_page):
+        engines = item.get('engines', default_engines)
+        page = item.get('page', default_page)
+        if not isinstance(engines, list) or not engines or not all(isinstance(e, str) for e in engines):
+            raise ValueError('"engines" must be a non-empty list of engine names')
+        unknown = [e for e in engines if e not in available]
+        if unknown:
+            raise ValueError(f'Unknown engine "{unknown[0]}"')
+        if not isinstance(page, int) or isinstance(page, bool) or page < 1:
+            raise ValueError('"page" must be a positive integer')
+        return list(dict.fromkeys(engines)), page
+
+    engines, page = options(payload, available, 1)
+    items = []
+    for item in payload['queries']:
+        if isinstance(item, str):
+            item = {'q': item}
+        if not isinstance(item, dict) or not isinstance(item.get('q'), str) or not normalize_query(item['q']):
+            raise ValueError('Each query must be a non-empty string or an object with "q"')
+        items.append((item['q'], *options(item, engines, page)))
+    return items
+
+@app.route('/api/search/batch', methods=['POST'])
+def api_search_batch():
+    """API endpoint to run several searches in one request
+
+    Cached queries are answered first. The rest run on the batch engine
+    pool, which is separate from the one interactive searches use; a query
+    is only submitted when the pool has a free thread, so each query's
+    ENGINE_TIMEOUT starts when its engines can actually start. The response
+    is NDJSON: one line per query, written as soon as that query's engines
+    have all answered, with "index" giving its position in the request.
+    """
+    try:
+        items = parse_batch(request.get_json(silent=True))
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    def line(index, data):
+        return json.dumps({**data, 'index': index, 'query': items[index][0]}) + '\n'
+
+    def generate():
+        executor = get_batch_executor()
+        queued = {}
+        pending = {}
+
+        for index, (raw_query, engines, page) in enumerate(items):
+            query = clean_query(raw_query)
+            cache_key = web_cache_key(normalize_query(raw_query), engines, page)
+            cached, stale = cache_lookup(cache_key, raw_query)
+            if cached is not None:
+                if stale:
+                    search_cache.refresh(
+                        cache_key, lambda k=cache_key, q=query, e=engines, p=page: store_results(k, run_web_search(q, e, p))
+                    )
+                yield line(index, cached)
+            elif cache_key in queued:
+                # The same search twice in one batch runs once
+                queued[cache_key][-1].append(index)
+            else:
+                queued[cache_key] = (query, engines, page, [index])
+
+        queued = list(queued.items())
+        while queued or pending:
+            running = [future for entry in pending.values() for future in entry[3].values() if not future.done()]
+            while queued and (not pending or len(running) < BATCH_WORKERS):
+                cache_key, (query, engines, page, indexes) = queued.pop(0)
+                futures = submit_engine_searches(query, engines, page, executor)
+                pending[cache_key] = (query, engines, page, futures, indexes, time.time())
+                running.extend(future for future in futures.values() if not future.done())
+
+            deadline = min(entry[5] for entry in pending.values()) + ENGINE_TIMEOUT
+            if running:
+                wait(running, timeout=max(0, deadline - time.time()), return_when=FIRST_COMPLETED)
+
+            now = time.time()
+            for cache_key in [key for key, entry in pending.items()
+                              if now >= entry[5] + ENGINE_TIMEOUT or all(f.done() for f in entry[3].values())]:
+                query, engines, page, futures, indexes, started = pending.pop(cache_key)
+                try:
+                    results = complete_web_search(merge_engine_results(query, engines, futures, started), page)
+                except Exception as e:
+                    logger.error("Error searching for '%s' in batch: %s", query, e)
+                    results = {'query': query, 'error': str(e)}
+                else:
+                    store_results(cache_key, results)
+                for index in indexes:
+                    yield line(index, results)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/local-search')
+def api_local_search():
+    """API endpoint to get instant results from the local index of past results"""
+    query = request.args.get('q', '')
+    page = request.args.get('page', 1, type=int)
+    
+    if not normalize_query(query):
+        return jsonify({'error': 'No query provided'}), 400
+    
+    start_time = time.time()
+    results = local_index.search(normalize_query(query), limit=10, offset=(page - 1) * 10)
+    categories = tag_categories(results)
+    
+    return jsonify({
+        'query': query,
+        'results': results,
+        'all_results': results,
+        'count': len(results),
+        'categories': categories,
+        'local': True,
+        'time': round(time.time() - start_time, 2)
+    })
+
 @app.route('/about')
 def about():
     """Render the about me page"""
@@ -155,42 +485,76 @@ def page_not_found(e):
 @app.route('/api/image-search')
 def api_image_search():
     """API endpoint to get image search results"""
-    query = request.args.get('q', '')
+    raw_query = request.args.get('q', '')
+    query = normalize_query(raw_query)
+    search_query = clean_query(raw_query)
     page = request.args.get('page', 1, type=int)
     
     if not query:
         return jsonify({'error': 'No query provided'}), 400
     
     try:
-        # Check cache first
-        cache_key = f"img:{query}:{page}"
-        if cache_key in search_cache:
-            logger.debug(f"Returning cached image results for '{query}'")
-            return jsonify(search_cache[cache_key])
+        # Check cache first, refreshing stale entries in the background
+        cache_key = image_cache_key(query, page)
+        cached, stale = cache_lookup(cache_key, raw_query)
+        if cached is not None:
+            if stale:
+                search_cache.refresh(cache_key, lambda: store_results(cache_key, run_image_search(search_query, page)))
+            logger.debug("Returning %s cached image results for '%s'", 'stale' if stale else 'fresh', query)
+            return jsonify(image_response(cached, raw_query))
         
         # If not in cache, perform the image search
-        results = search_all_image_engines(query, page=page)
-        
-        # Cache the results
-        search_cache[cache_key] = results
+        results = run_image_search(search_query, page)
         
-        # Clean up cache if it gets too large
-        if len(search_cache) > 100:
-            keys_to_remove = list(search_cache.keys())[:20]
-            for key in keys_to_remove:
-                search_cache.pop(key, None)
+        # Cache the results (briefly if rate limiting left some engines out)
+        store_results(cache_key, results)
                 
-        return jsonify(results)
+        return jsonify(image_response(results, raw_query))
     
     except Exception as e:
-        logger.error(f"Error searching for images '{query}': {str(e)}")
+        logger.error("Error searching for images '%s': %s", query, e)
         return jsonify({'error': str(e)}), 500
 
 
+@app.route('/thumbnail/<name>')
+def thumbnail(name):
+    """Serve an inline thumbnail taken out of image results, refilling it if needed"""
+    path = thumbnail_store.get(name)
+    if path is None:
+        path = refill_thumbnail(
+            name, request.args.get('q', ''), request.args.get('page', 1, type=int)
+        )
+        if path is None:
+            abort(404)
+    response = send_file(path, max_age=THUMBNAIL_MAX_AGE, conditional=True, etag=name)
+    response.cache_control.immutable = True
+    return response
+
+@app.route('/thumbnail-proxy')
+def thumbnail_proxy():
+    """Fetch a remote thumbnail once, cache it on disk and serve it from there"""
+    url = request.args.get('url', '')
+    if not thumbnail_secret:
+        abort(404)
+    if not verify_url(url, request.args.get('sig'), thumbnail_secret):
+        abort(403)
+    
+    name = thumbnail_store.get_remote(url)
+    if name is None:
+        try:
+            name = thumbnail_store.fetch_remote(url)
+        except Exception as e:
+            logger.warning("Failed to proxy thumbnail %s: %s", url, e)
+        if name is None:
+            abort(404)
+    
+    return send_file(thumbnail_store.get(name), max_age=THUMBNAIL_MAX_AGE, conditional=True, etag=name)
+
+
 @app.route('/api/search-suggestions')
 def api_search_suggestions():
     """API endpoint to get search suggestions based on history"""
-    query = request.args.get('q', '').lower()
+    query = normalize_query(request.args.get('q', ''))
     
     if not query or len(query) < 2:
         return jsonify([])
@@ -211,7 +575,7 @@ def api_search_suggestions():
         return jsonify(suggestions)
     
     except Exception as e:
-        logger.error(f"Error getting search suggestions for '{query}': {str(e)}")
+        logger.error("Error getting search suggestions for '%s': %s", query, e)
         return jsonify([])
 
 
@@ -254,11 +618,8 @@ def admin_dashboard():
     if 'admin_logged_in' not in session or not session['admin_logged_in']:
         return redirect(url_for('admin_login'))
     
-    # Get recent search history
-    recent_searches = db.session.query(models.SearchHistory)\
-        .order_by(models.SearchHistory.timestamp.desc())\
-        .limit(100)\
-        .all()
+    # Get the first page of search history; the rest is loaded from /api/admin/history
+    recent_searches, next_cursor = history_page(db.session, models.SearchHistory, limit=HISTORY_PAGE_SIZE)
     
     # Get search counts
     search_counts = db.session.query(
@@ -272,9 +633,66 @@ def admin_dashboard():
     return render_template(
         'admin_dashboard.html',
         recent_searches=recent_searches,
-        search_counts=search_counts
+        next_cursor=next_cursor,
+        search_counts=search_counts,
+        cache_stats=normalization_stats.as_dict()
+    )
+
+def history_filters():
+    """Read the history browser's filters from the query string"""
+    return {
+        'prefix': normalize_query(request.args.get('q', '')) or None,
+        'ip': request.args.get('ip') or None,
+        'engine': request.args.get('engine') or None,
+    }
+
+@app.route('/api/admin/history')
+def api_admin_history():
+    """API endpoint to page through search history - requires admin login"""
+    if 'admin_logged_in' not in session or not session['admin_logged_in']:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    limit = min(max(request.args.get('limit', HISTORY_PAGE_SIZE, type=int), 1), 500)
+    
+    try:
+        items, next_cursor = history_page(
+            db.session, models.SearchHistory,
+            limit=limit, cursor=request.args.get('cursor'), **history_filters()
+        )
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    
+    return jsonify({'items': items, 'next_cursor': next_cursor})
+
+@app.route('/api/admin/history/export')
+def api_admin_history_export():
+    """Stream search history as CSV or NDJSON - requires admin login"""
+    if 'admin_logged_in' not in session or not session['admin_logged_in']:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    export_format = request.args.get('format', 'csv')
+    if export_format not in ('csv', 'ndjson'):
+        return jsonify({'error': 'Format must be csv or ndjson'}), 400
+    
+    mimetype = 'text/csv' if export_format == 'csv' else 'application/x-ndjson'
+    rows = stream_history(db.session, models.SearchHistory, export_format, **history_filters())
+    return Response(
+        stream_with_context(rows),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=search-history.{export_format}'}
     )
 
+@app.route('/api/admin/cache-stats')
+def api_admin_cache_stats():
+    """API endpoint with this worker's cache hit rates, with and without query normalization"""
+    if 'admin_logged_in' not in session or not session['admin_logged_in']:
+        return jsonify({'error': 'Unauthorized'}), 401
+    
+    return jsonify({
+        'entries': len(search_cache),
+        **normalization_stats.as_dict()
+    })
+
 @app.route('/api/admin/clear-history', methods=['POST'])
 def api_admin_clear_history():
     """API endpoint to clear search history - requires admin login"""
@@ -286,7 +704,7 @@ def api_admin_clear_history():
         db.session.commit()
         return jsonify({'success': True, 'message': 'Search history cleared'})
     except Exception as e:
-        logger.error(f"Error clearing search history: {str(e)}")
+        logger.error("Error clearing search history: %s", e)
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
 
@@ -298,5 +716,5 @@ def health_check():
 @app.errorhandler(500)
 def server_error(e):
     """Handle 500 errors"""
-    logger.error(f"Server error: {str(e)}")
+    logger.error("Server error: %s", e)
     return render_template('index.html', error="An internal server error occurred"), 500
@@ -0,0 +1,79 @@
+"""Benchmark result categorization against large domain lists
+
+Generates synthetic <category>.txt lists (100k domains in total by default),
+loads them into DomainClassifier and times classify_url over a batch of
+result URLs, next to the old approach of testing every domain as a
+substring of every URL.
+
+    python benchmarks/bench_classifier.py --domains 100000 --urls 100000
+"""
+import os
+import sys
+import time
+import random
+import string
+import argparse
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from domain_classifier import CATEGORIES, DomainClassifier  # noqa: E402
+
+TLDS = ['com', 'org', 'net', 'co.uk', 'de', 'io']
+
+
+def random_domain(rng):
+    name = ''.join(rng.choices(string.ascii_lowercase, k=rng.randint(5, 14)))
+    return f"{name}.{rng.choice(TLDS)}"
+
+
+def random_url(rng, domains):
+    # Half the URLs hit a listed domain (often through a subdomain), half do not
+    host = rng.choice(domains) if rng.random() < 0.5 else random_domain(rng)
+    if rng.random() < 0.5:
+        host = rng.choice(['www', 'en', 'm', 'news']) + '.' + host
+    return f"https://{host}/{''.join(rng.choices(string.ascii_lowercase, k=10))}?id={rng.randint(1, 10**6)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--domains', type=int, default=100000, help='total listed domains')
+    parser.add_argument('--urls', type=int, default=100000, help='result URLs to classify')
+    parser.add_argument('--substring-urls', type=int, default=200,
+                        help='URLs to time with the old substring scan (it is far slower)')
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    domains = list({random_domain(rng) for _ in range(args.domains)})
+    urls = [random_url(rng, domains) for _ in range(args.urls)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        per_category = len(domains) // len(CATEGORIES) + 1
+        for i, category in enumerate(CATEGORIES):
+            with open(os.path.join(directory, f'{category}.txt'), 'w') as f:
+                f.write('\n'.join(domains[i * per_category:(i + 1) * per_category]))
+
+        classifier = DomainClassifier()
+        started = time.perf_counter()
+        classifier.load_directory(directory)
+        load_s = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = sum(1 for url in urls if classifier.classify_url(url))
+    hashed_s = time.perf_counter() - started
+
+    sample = urls[:args.substring_urls]
+    started = time.perf_counter()
+    for url in sample:
+        lowered = url.lower()
+        any(domain in lowered for domain in domains)
+    substring_s = time.perf_counter() - started
+
+    print(f"domains loaded:        {len(classifier)} in {load_s * 1000:.0f} ms")
+    print(f"hashed suffix lookup:  {hashed_s / len(urls) * 1e6:.2f} us/result "
+          f"({len(urls)} URLs, {matched} categorized)")
+    print(f"substring scan (old):  {substring_s / len(sample) * 1e6:.0f} us/result ({len(sample)} URLs)")
+    print(f"speedup:               {(substring_s / len(sample)) / (hashed_s / len(urls)):.0f}x")
+
+
+if __name__ == '__main__':
+    main()
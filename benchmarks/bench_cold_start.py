@@ -0,0 +1,65 @@
+"""Measure serverless cold start cost: importing app.py and serving /health
+
+Each run is a fresh interpreter, as on a Vercel cold start. To compare with
+an older revision, check it out next to this one and pass its path:
+
+    git worktree add /tmp/colossus-base <ref>
+    python benchmarks/bench_cold_start.py --path /tmp/colossus-base
+    python benchmarks/bench_cold_start.py
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose presence after import tells us what was (not) deferred
+HEAVY_MODULES = ['bs4', 'requests', 'psycopg2', 'sqlalchemy']
+
+CHILD = """
+import sys, time, json
+start = time.perf_counter()
+import app
+imported = time.perf_counter()
+app.app.test_client().get('/health')
+served = time.perf_counter()
+print(json.dumps({
+    'import_ms': (imported - start) * 1000,
+    'first_request_ms': (served - imported) * 1000,
+    'loaded': [m for m in %r if m in sys.modules],
+}))
+"""
+
+
+def run_once(path):
+    """Run one cold start in a fresh interpreter and return its measurements"""
+    output = subprocess.run(
+        [sys.executable, '-c', CHILD % HEAVY_MODULES],
+        cwd=path, capture_output=True, text=True, check=True,
+        env=dict(os.environ, LOG_LEVEL='WARNING'),
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--path', default=ROOT, help='checkout to benchmark (default: this one)')
+    parser.add_argument('--runs', type=int, default=10)
+    args = parser.parse_args()
+
+    runs = [run_once(args.path) for _ in range(args.runs)]
+    import_ms = [r['import_ms'] for r in runs]
+    request_ms = [r['first_request_ms'] for r in runs]
+
+    print(f"checkout:              {args.path}")
+    print(f"import app (median):   {statistics.median(import_ms):.1f} ms")
+    print(f"first /health (median): {statistics.median(request_ms):.1f} ms")
+    print(f"cold start total:      {statistics.median(i + r for i, r in zip(import_ms, request_ms)):.1f} ms")
+    print(f"heavy modules loaded:  {', '.join(runs[0]['loaded']) or 'none'}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Benchmark result page parsing inline versus in the parse process pool
+
+Renders synthetic result pages with the load-test stub's markup, padded
+with filler markup to the size of a real results page, then parses them
+from several concurrent threads (standing in for concurrent requests on
+one web worker): first inline, as with PARSE_WORKERS=0, then through
+ParsePool with increasing numbers of processes.
+
+    python benchmarks/bench_parse_pool.py --pages 200 --threads 8 --workers 1,2,4
+"""
+import os
+import sys
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from engines import ENGINES, get_engine_names  # noqa: E402
+from parse_pool import ParsePool  # noqa: E402
+from loadtest.stub_engines import render_page  # noqa: E402
+
+# Navigation, scripts and widgets that surround the results on a real page
+FILLER = '<div class="nav"><span><a href="/x">item</a></span><ul><li>one</li><li>two</li></ul></div>'
+
+
+def make_pages(count, page_kb):
+    engines = get_engine_names('web')
+    pages = []
+    for i in range(count):
+        engine = engines[i % len(engines)]
+        html = render_page(engine, f"benchmark query {i}", '0')
+        padding = FILLER * (page_kb * 1024 // len(FILLER))
+        html = html.replace('<body>', '<body>' + padding, 1)
+        pages.append((ENGINES[engine], html.encode()))
+    return pages
+
+
+def run(pool, pages, threads):
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        counts = list(executor.map(lambda page: len(pool.parse(page[0], page[1], 'utf-8')), pages))
+    elapsed = time.perf_counter() - started
+    return elapsed, sum(counts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pages', type=int, default=200, help='result pages to parse per run')
+    parser.add_argument('--page-kb', type=int, default=150, help='approximate size of each page')
+    parser.add_argument('--threads', type=int, default=8, help='concurrent parsing threads')
+    parser.add_argument('--workers', default=','.join(str(n) for n in sorted({1, 2, os.cpu_count() or 1})),
+                        help='comma-separated process counts to try')
+    args = parser.parse_args()
+
+    pages = make_pages(args.pages, args.page_kb)
+    print(f"{len(pages)} pages of ~{args.page_kb} KB, {args.threads} threads, {os.cpu_count()} CPUs")
+
+    inline_s, results = run(ParsePool(0), pages, args.threads)
+    print(f"inline:        {len(pages) / inline_s:7.1f} pages/s  ({results} results)")
+
+    for workers in (int(n) for n in args.workers.split(',')):
+        pool = ParsePool(workers)
+        # Start the processes and compile selectors outside the timed run
+        run(pool, pages[:workers * 2], workers)
+        elapsed, results = run(pool, pages, args.threads)
+        pool.shutdown()
+        print(f"{workers:2d} processes:  {len(pages) / elapsed:7.1f} pages/s  "
+              f"({results} results, {inline_s / elapsed:.2f}x inline)")
+
+
+if __name__ == '__main__':
+    main()
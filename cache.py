@@ -0,0 +1,174 @@
+import os
+import json
+import mmap
+import time
+import zlib
+import atexit
+import struct
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+# Snapshot file layout: SNAPSHOT_MAGIC, then one record per entry, each a
+# 4-byte big-endian length followed by a zlib-compressed JSON [key, created, value]
+SNAPSHOT_MAGIC = b'CSNAP1\n'
+_RECORD_HEADER = struct.Struct('>I')
+
+
+class SearchCache:
+    """LRU cache of search responses with stale-while-revalidate semantics
+
+    Entries younger than ``soft_ttl`` seconds are fresh. Between ``soft_ttl``
+    and ``hard_ttl`` they are stale: still served, but the caller should
+    schedule a refresh. Past ``hard_ttl`` they are treated as missing.
+    """
+
+    def __init__(self, soft_ttl=300, hard_ttl=3600, max_entries=100, refresh_workers=2):
+        self.soft_ttl = soft_ttl
+        self.hard_ttl = hard_ttl
+        self.max_entries = max_entries
+        self.refresh_workers = refresh_workers
+        self._entries = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self._executor = None
+
+    def __len__(self):
+        return len(self._entries)
+
+    def get(self, key):
+        """Return (value, is_stale) for a key, or (None, False) on a miss"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None, False
+
+            value, created = entry
+            age = now - created
+            if age >= self.hard_ttl:
+                del self._entries[key]
+                return None, False
+
+            self._entries.move_to_end(key)
+            return value, age >= self.soft_ttl
+
+    def set(self, key, value, created=None, soft_ttl=None):
+        """Store a value, evicting the least recently used entries beyond max_entries
+
+        ``soft_ttl`` makes this entry go stale sooner than the others. It is
+        applied by backdating the entry's creation time, so it carries over
+        into snapshots unchanged.
+        """
+        if created is None:
+            created = time.time()
+            if soft_ttl is not None:
+                created -= max(0, self.soft_ttl - soft_ttl)
+        with self._lock:
+            self._entries[key] = (value, created)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def refresh(self, key, fetch):
+        """Recompute a key in the background, at most once at a time per key
+
+        ``fetch`` is called with no arguments on a worker thread and returns
+        the new value, or None to leave the current entry as it is.
+        """
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.refresh_workers,
+                    thread_name_prefix='cache-refresh'
+                )
+
+        self._executor.submit(self._run_refresh, key, fetch)
+        return True
+
+    def _run_refresh(self, key, fetch):
+        try:
+            value = fetch()
+            if value is not None:
+                self.set(key, value)
+        except Exception as e:
+            logger.error("Background refresh of '%s' failed: %s", key, e)
+        finally:
+            with self._lock:
+                self._refreshing.discard(key)
+
+    def snapshot(self, path):
+        """Write all live entries to a snapshot file, replacing it atomically"""
+        now = time.time()
+        with self._lock:
+            entries = [(key, value, created) for key, (value, created) in self._entries.items()
+                       if now - created < self.hard_ttl]
+
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            for key, value, created in entries:
+                record = zlib.compress(json.dumps([key, created, value], separators=(',', ':')).encode(), 1)
+                f.write(_RECORD_HEADER.pack(len(record)))
+                f.write(record)
+        os.replace(tmp_path, path)
+        return len(entries)
+
+    def load(self, path):
+        """Restore entries from a snapshot file, skipping any past their hard TTL
+
+        The file is memory-mapped so only one record at a time is copied out
+        of the page cache. Returns the number of entries restored.
+        """
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            return 0
+
+        now = time.time()
+        restored = 0
+        with f:
+            if os.fstat(f.fileno()).st_size <= len(SNAPSHOT_MAGIC):
+                return 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+                    logger.error("Ignoring cache snapshot %s with unknown format", path)
+                    return 0
+
+                offset = len(SNAPSHOT_MAGIC)
+                while offset + _RECORD_HEADER.size <= len(data):
+                    (length,) = _RECORD_HEADER.unpack_from(data, offset)
+                    offset += _RECORD_HEADER.size
+                    try:
+                        key, created, value = json.loads(zlib.decompress(data[offset:offset + length]))
+                    except (zlib.error, ValueError) as e:
+                        logger.error("Stopping at corrupt record in cache snapshot %s: %s", path, e)
+                        break
+                    offset += length
+                    if now - created < self.hard_ttl:
+                        self.set(key, value, created=created)
+                        restored += 1
+        return restored
+
+    def start_snapshots(self, path, interval):
+        """Snapshot to ``path`` every ``interval`` seconds (0 = only at exit) and at interpreter exit"""
+        def save():
+            try:
+                self.snapshot(path)
+            except OSError as e:
+                logger.error("Failed to snapshot search cache to %s: %s", path, e)
+
+        def loop():
+            while True:
+                time.sleep(interval)
+                save()
+
+        atexit.register(save)
+        if interval > 0:
+            threading.Thread(target=loop, name='cache-snapshot', daemon=True).start()
@@ -0,0 +1,112 @@
+import threading
+from weakref import WeakKeyDictionary
+from flask_sqlalchemy import SQLAlchemy
+
+
+class _DeferredEngine:
+    """Placeholder for an engine that has not been created yet
+
+    _LazyEngines never hands one out; if one leaks anyway, using it fails
+    loudly instead of behaving like a half-working engine.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+
+    def __getattr__(self, name):
+        raise RuntimeError(
+            f"Engine attribute '{name}' read before the engine was created; "
+            "this Flask-SQLAlchemy code path is not supported by LazySQLAlchemy"
+        )
+
+
+class _LazyEngines(dict):
+    """Bind-key -> engine map that creates each engine on first access
+
+    Every way of reading values out of the dict (item access, get(),
+    values(), items(), pop() and so on) goes through _resolve, so callers
+    only ever see real engines. Code that iterates over all engines, such
+    as SQLALCHEMY_RECORD_QUERIES in init_app, simply creates them there.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.RLock()
+
+    def _resolve(self, key):
+        engine = super().__getitem__(key)
+        if isinstance(engine, _DeferredEngine):
+            with self._lock:
+                engine = super().__getitem__(key)
+                if isinstance(engine, _DeferredEngine):
+                    engine = engine.factory()
+                    super().__setitem__(key, engine)
+        return engine
+
+    def __getitem__(self, key):
+        return self._resolve(key)
+
+    def get(self, key, default=None):
+        return self._resolve(key) if key in self else default
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            super().__setitem__(key, default)
+        return self._resolve(key)
+
+    def pop(self, key, *default):
+        if key not in self:
+            return super().pop(key, *default)
+        engine = self._resolve(key)
+        super().pop(key)
+        return engine
+
+    def popitem(self):
+        key = next(reversed(self.keys()))
+        return key, self.pop(key)
+
+    def values(self):
+        return [self._resolve(key) for key in list(self.keys())]
+
+    def items(self):
+        return [(key, self._resolve(key)) for key in list(self.keys())]
+
+    def copy(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        return dict(self.items()) == other
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr({key: super(_LazyEngines, self).__getitem__(key) for key in self.keys()})
+
+
+class LazySQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy extension that defers engine creation to first use
+
+    ``init_app`` still registers its teardown handlers at import time (Flask
+    rejects setup calls after the first request), but creating the engine --
+    which imports the DBAPI driver and builds the pool -- waits until a
+    session actually needs a connection. Requests that never touch the
+    database, such as /health or a cached /api/search, never pay for it.
+
+    This hooks into Flask-SQLAlchemy 3.1's per-app engine map and engine
+    factory, which are not public API, so it checks they are still there
+    and refuses to start if a different version changed them.
+    """
+
+    def init_app(self, app):
+        if not isinstance(getattr(self, '_app_engines', None), WeakKeyDictionary) \
+                or not callable(getattr(SQLAlchemy, '_make_engine', None)):
+            raise RuntimeError(
+                "LazySQLAlchemy does not support this Flask-SQLAlchemy version; "
+                "use flask_sqlalchemy.SQLAlchemy instead"
+            )
+        self._app_engines[app] = _LazyEngines()
+        super().init_app(app)
+
+    def _make_engine(self, bind_key, options, app):
+        make_engine = super()._make_engine
+        return _DeferredEngine(lambda: make_engine(bind_key, options, app))
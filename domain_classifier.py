@@ -0,0 +1,102 @@
+import os
+import logging
+import threading
+import urllib.parse
+
+logger = logging.getLogger(__name__)
+
+# Categories we classify into; each is loaded from <category>.txt
+CATEGORIES = ('news', 'video', 'shopping', 'reference')
+
+# Domain lists shipped with the app
+BUILTIN_LISTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'domains')
+
+# Hosts deeper than this are truncated before lookup, which bounds the work per URL
+MAX_LABELS = 6
+
+
+class DomainClassifier:
+    """Map URLs to categories via a hash index of domains and their subdomains
+
+    Lookup hashes the host and each parent domain of it (a.b.example.com,
+    b.example.com, example.com) until one is in the index, so the cost per
+    URL depends on the number of labels in its host, not on how many domains
+    are loaded. Matching whole labels also means 'time.com' matches
+    www.time.com but not runtime.com or time.com.example.org.
+    """
+
+    def __init__(self):
+        self._index = {}
+
+    def __len__(self):
+        return len(self._index)
+
+    def add(self, domain, category):
+        """Index a domain (and implicitly all its subdomains) under a category"""
+        domain = domain.strip().lower().rstrip('.')
+        if domain.startswith('www.'):
+            domain = domain[4:]
+        if domain:
+            self._index[domain] = category
+
+    def load_file(self, path, category):
+        """Load a domain list file: one domain per line, '#' starts a comment"""
+        with open(path, encoding='utf-8') as f:
+            for line in f:
+                self.add(line.split('#', 1)[0], category)
+
+    def load_directory(self, directory):
+        """Load <category>.txt for every known category present in a directory"""
+        for category in CATEGORIES:
+            path = os.path.join(directory, f'{category}.txt')
+            if os.path.exists(path):
+                self.load_file(path, category)
+
+    def classify_host(self, host):
+        """Return the category of a hostname, or None"""
+        if not host:
+            return None
+        labels = host.lower().rstrip('.').split('.')[-MAX_LABELS:]
+        # Stop before the bare TLD: 'com' itself is never a listed domain
+        for i in range(len(labels) - 1):
+            category = self._index.get('.'.join(labels[i:]))
+            if category is not None:
+                return category
+        return None
+
+    def classify_url(self, url):
+        """Return the category of a URL, or None"""
+        try:
+            return self.classify_host(urllib.parse.urlsplit(url).hostname)
+        except ValueError:
+            return None
+
+
+_classifier = None
+_classifier_lock = threading.Lock()
+
+
+def get_classifier():
+    """Return the shared classifier, loading domain lists on first use
+
+    The built-in lists are always loaded; DOMAIN_LISTS_DIR may point at a
+    directory of larger external lists in the same <category>.txt format,
+    whose entries take precedence.
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                classifier = DomainClassifier()
+                classifier.load_directory(BUILTIN_LISTS_DIR)
+                external = os.environ.get('DOMAIN_LISTS_DIR')
+                if external:
+                    classifier.load_directory(external)
+                logger.info("Loaded %d categorized domains", len(classifier))
+                _classifier = classifier
+    return _classifier
+
+
+def classify_url(url):
+    """Return the category of a URL ('news', 'video', ...) or 'web' if unlisted"""
+    return get_classifier().classify_url(url) or 'web'
@@ -0,0 +1,214 @@
+import os
+import urllib.parse
+from dataclasses import dataclass, replace, field as dataclass_field
+
+# Registry of all search engines, keyed by engine name
+ENGINES = {}
+
+
+@dataclass(frozen=True)
+class Field:
+    """How to pull one value out of a result container
+
+    selector: CSS selector relative to the container (None = the container itself)
+    attr: attribute to read (None = the element's text)
+    fallback_attr: attribute to try when ``attr`` is empty
+    prefix: string prepended to the value (for site-relative links)
+    clean: callable applied to the value; returning None drops it
+    default: value used when nothing was found (None = skip the whole result)
+    """
+    selector: str = None
+    attr: str = None
+    fallback_attr: str = None
+    prefix: str = ''
+    clean: object = None
+    default: str = None
+
+
+@dataclass(frozen=True)
+class EngineSpec:
+    """Everything needed to query one engine and map its results
+
+    ``url`` is a template with ``{query}`` (already URL-quoted) and
+    ``{offset}`` placeholders; the offset of page N is
+    ``(N - 1) * per_page + first_offset``. ``rate_limit`` (requests per
+    second) and ``burst`` are the default outbound budget for the engine's
+    host; see rate_limiter.get_budget for overrides.
+    """
+    name: str
+    label: str
+    kind: str
+    url: str
+    container: str
+    fields: dict
+    per_page: int = 10
+    first_offset: int = 0
+    referer: str = None
+    timeout: float = 5
+    rate_limit: float = 1.0
+    burst: float = 10
+    constants: dict = dataclass_field(default_factory=dict)
+
+    def build_url(self, query, page=1):
+        """Return the request URL for a query and page"""
+        offset = (page - 1) * self.per_page + self.first_offset
+        return self.url.format(query=urllib.parse.quote(query), offset=offset)
+
+
+def register_engine(spec):
+    """Add an engine spec to the registry
+
+    ENGINE_URL_<NAME> replaces the spec's URL template, e.g. to point an
+    engine at a local stand-in during load tests.
+    """
+    url = os.environ.get(f'ENGINE_URL_{spec.name.upper()}')
+    if url:
+        spec = replace(spec, url=url)
+    ENGINES[spec.name] = spec
+    return spec
+
+
+def get_engine_names(kind):
+    """Return the names of all registered engines of a kind ('web' or 'image')"""
+    return [name for name, spec in ENGINES.items() if spec.kind == kind]
+
+
+def http_link(link):
+    """Keep only absolute http(s) links"""
+    return link if link.startswith(('http://', 'https://')) else None
+
+
+def unwrap_google_link(link):
+    """Strip Google's /url?q= redirect wrapper"""
+    if link.startswith('/url?q='):
+        link = link.split('/url?q=')[1].split('&')[0]
+    return http_link(link)
+
+
+def unwrap_duckduckgo_link(link):
+    """Resolve DuckDuckGo's //duckduckgo.com/l/?uddg= redirect"""
+    if '//duckduckgo.com/l/?' in link:
+        query_params = urllib.parse.parse_qs(urllib.parse.urlparse(link).query)
+        if 'uddg' in query_params:
+            link = query_params['uddg'][0]
+    return http_link(link)
+
+
+# Web engines
+
+register_engine(EngineSpec(
+    name='google',
+    label='Google',
+    kind='web',
+    url='https://www.google.com/search?q={query}&start={offset}',
+    referer='https://www.google.com/',
+    timeout=10,
+    rate_limit=0.5,
+    burst=5,
+    container='div.g',
+    fields={
+        'title': Field('h3', default='No title'),
+        'link': Field('a', attr='href', clean=unwrap_google_link),
+        'snippet': Field('div.VwiC3b', default=''),
+    },
+    constants={'source': 'google'},
+))
+
+register_engine(EngineSpec(
+    name='bing',
+    label='Bing',
+    kind='web',
+    url='https://www.bing.com/search?q={query}&first={offset}',
+    first_offset=1,
+    referer='https://www.bing.com/',
+    container='li.b_algo',
+    fields={
+        'title': Field('h2 a'),
+        'link': Field('h2 a', attr='href', clean=http_link),
+        'snippet': Field('p', default=''),
+    },
+    constants={'source': 'bing'},
+))
+
+# DuckDuckGo's HTML endpoint has no offset-based pagination
+register_engine(EngineSpec(
+    name='duckduckgo',
+    label='DuckDuckGo',
+    kind='web',
+    url='https://html.duckduckgo.com/html/?q={query}',
+    container='.result',
+    fields={
+        'title': Field('.result__a'),
+        'link': Field('.result__a', attr='href', clean=unwrap_duckduckgo_link),
+        'snippet': Field('.result__snippet', default=''),
+    },
+    constants={'source': 'duckduckgo'},
+))
+
+register_engine(EngineSpec(
+    name='yahoo',
+    label='Yahoo',
+    kind='web',
+    url='https://search.yahoo.com/search?p={query}&b={offset}',
+    first_offset=1,
+    referer='https://search.yahoo.com/',
+    container='div.algo',
+    fields={
+        'title': Field('h3 a'),
+        'link': Field('h3 a', attr='href', clean=http_link),
+        'snippet': Field('.compText', default=''),
+    },
+    constants={'source': 'yahoo'},
+))
+
+register_engine(EngineSpec(
+    name='brave',
+    label='Brave',
+    kind='web',
+    url='https://search.brave.com/search?q={query}&offset={offset}',
+    container='.snippet',
+    fields={
+        'title': Field('.snippet-title a'),
+        'link': Field('.snippet-title a', attr='href', clean=http_link),
+        'snippet': Field('.snippet-description', default=''),
+    },
+    constants={'source': 'brave'},
+))
+
+# Image engines
+
+# Note: Google's image markup changes frequently, so these selectors might need updates
+register_engine(EngineSpec(
+    name='google_images',
+    label='Google Image',
+    kind='image',
+    url='https://www.google.com/search?q={query}&tbm=isch&start={offset}',
+    per_page=20,
+    referer='https://www.google.com/',
+    rate_limit=0.5,
+    burst=5,
+    container='div.isv-r',
+    fields={
+        'title': Field('img.rg_i', attr='alt', default='No title available'),
+        'thumbnail': Field('img.rg_i', attr='src', fallback_attr='data-src'),
+        'image_url': Field('a', attr='href', prefix='https://www.google.com', default=''),
+    },
+    constants={'source': 'google_images', 'type': 'image'},
+))
+
+register_engine(EngineSpec(
+    name='bing_images',
+    label='Bing Image',
+    kind='image',
+    url='https://www.bing.com/images/search?q={query}&first={offset}',
+    per_page=20,
+    first_offset=1,
+    referer='https://www.bing.com/',
+    container='.imgpt',
+    fields={
+        'title': Field('img.mimg', attr='alt', default='No title available'),
+        'thumbnail': Field('img.mimg', attr='src', fallback_attr='data-src'),
+        'image_url': Field('a.iusc', attr='href', prefix='https://www.bing.com', default=''),
+    },
+    constants={'source': 'bing_images', 'type': 'image'},
+))
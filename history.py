@@ -0,0 +1,130 @@
+import io
+import csv
+import json
+import base64
+import datetime
+from sqlalchemy import or_, tuple_
+
+# Columns exposed by the history API and exports, in export order
+HISTORY_COLUMNS = ['id', 'timestamp', 'query', 'ip_address', 'user_agent', 'engines', 'results_count']
+
+# Rows fetched per round trip when streaming an export through a server-side cursor
+EXPORT_BATCH_SIZE = 1000
+
+
+class InvalidCursor(ValueError):
+    """Raised when a pagination cursor cannot be decoded"""
+
+
+def encode_cursor(timestamp, row_id):
+    """Encode the (timestamp, id) of the last row on a page as an opaque cursor"""
+    raw = f"{timestamp.isoformat()}|{row_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(cursor):
+    """Decode a cursor back into (timestamp, id)"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4)).decode()
+        timestamp, row_id = raw.rsplit('|', 1)
+        return datetime.datetime.fromisoformat(timestamp), int(row_id)
+    except (ValueError, UnicodeDecodeError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+# Leading characters that make spreadsheet applications treat a cell as a formula
+FORMULA_PREFIXES = ('=', '+', '-', '@', '\t', '\r')
+
+
+def csv_cell(value):
+    """Neutralize a CSV value that a spreadsheet would otherwise evaluate as a formula"""
+    if isinstance(value, str) and value.startswith(FORMULA_PREFIXES):
+        return "'" + value
+    return value
+
+
+def _escape_like(value):
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def filter_history(query, model, prefix=None, ip=None, engine=None):
+    """Apply the history browser's filters to a query over SearchHistory
+
+    prefix: search query starts with this (case-sensitive, so it can use an index)
+    ip: exact client IP address
+    engine: one of the comma-separated engines the search used
+    """
+    if prefix:
+        query = query.filter(model.query.like(_escape_like(prefix) + '%', escape='\\'))
+    if ip:
+        query = query.filter(model.ip_address == ip)
+    if engine:
+        escaped = _escape_like(engine)
+        query = query.filter(or_(
+            model.engines == engine,
+            model.engines.like(escaped + ',%', escape='\\'),
+            model.engines.like('%,' + escaped, escape='\\'),
+            model.engines.like('%,' + escaped + ',%', escape='\\'),
+        ))
+    return query
+
+
+def history_page(session, model, limit=50, cursor=None, **filters):
+    """Return (rows, next_cursor) for one page of history, newest first
+
+    Pages are keyed on (timestamp, id) rather than OFFSET, so each page is
+    a single index range scan no matter how deep into the history it is.
+    """
+    columns = [getattr(model, name) for name in HISTORY_COLUMNS]
+    query = filter_history(session.query(*columns), model, **filters)
+
+    if cursor:
+        timestamp, row_id = decode_cursor(cursor)
+        query = query.filter(tuple_(model.timestamp, model.id) < tuple_(timestamp, row_id))
+
+    rows = query.order_by(model.timestamp.desc(), model.id.desc()).limit(limit + 1).all()
+    next_cursor = None
+    if len(rows) > limit:
+        rows = rows[:limit]
+        next_cursor = encode_cursor(rows[-1].timestamp, rows[-1].id)
+    return [serialize_row(row) for row in rows], next_cursor
+
+
+def serialize_row(row):
+    """Turn a history row into a JSON-friendly dict"""
+    data = dict(zip(HISTORY_COLUMNS, row))
+    if data['timestamp'] is not None:
+        data['timestamp'] = data['timestamp'].isoformat()
+    return data
+
+
+def stream_history(session, model, export_format='csv', **filters):
+    """Yield a history export chunk by chunk, newest first
+
+    Rows come from a server-side cursor EXPORT_BATCH_SIZE at a time and
+    each batch is written out before the next is fetched, so memory use
+    does not grow with the size of the history.
+    """
+    columns = [getattr(model, name) for name in HISTORY_COLUMNS]
+    query = filter_history(session.query(*columns), model, **filters)\
+        .order_by(model.timestamp.desc(), model.id.desc())\
+        .execution_options(yield_per=EXPORT_BATCH_SIZE)
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if export_format == 'csv':
+        writer.writerow(HISTORY_COLUMNS)
+
+    for count, row in enumerate(query, 1):
+        data = serialize_row(row)
+        if export_format == 'csv':
+            writer.writerow([csv_cell(data[name]) for name in HISTORY_COLUMNS])
+        else:
+            buffer.write(json.dumps(data) + '\n')
+
+        if count % EXPORT_BATCH_SIZE == 0:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
@@ -0,0 +1,15 @@
+import sys
+from app import app, db, history_indexes
+
+# Schema migration script, run once per deploy instead of on every cold start
+if __name__ == "__main__":
+    with app.app_context():
+        try:
+            db.create_all()
+            # create_all skips tables that already exist, so add newer indexes explicitly
+            for index in history_indexes:
+                index.create(db.engine, checkfirst=True)
+            print("Database tables created successfully!")
+        except Exception as e:
+            print(f"Error: Failed to create database tables: {str(e)}")
+            sys.exit(1)
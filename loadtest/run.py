@@ -0,0 +1,308 @@
+"""End-to-end load test of /api/search across gunicorn worker models
+
+Starts the stub engines (stub_engines.py), a scratch SQLite database and,
+for every worker class and concurrency level, a fresh gunicorn serving
+main:app. Then drives a Zipf-distributed query mix at it for a fixed
+duration. Throughput, latency percentiles, error counts and the RSS and
+thread counts of the gunicorn processes are written as JSON to
+loadtest/results/ so runs can be compared later:
+
+    python loadtest/run.py --worker-classes sync,gthread,gevent --concurrency 1,8,32
+    python loadtest/run.py --compare
+
+Process sampling reads /proc, so memory and thread figures are Linux only.
+The gevent worker class needs gevent installed and is skipped otherwise.
+"""
+import os
+import sys
+import json
+import time
+import random
+import string
+import socket
+import argparse
+import tempfile
+import threading
+import subprocess
+import statistics
+import importlib.util
+import urllib.parse
+
+import requests
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(HERE)
+sys.path.insert(0, HERE)
+from stub_engines import engine_url_env  # noqa: E402
+
+RESULTS_DIR = os.path.join(HERE, 'results')
+
+DEFAULT_QUERIES = [
+    'python', 'weather', 'news', 'flask tutorial', 'football scores', 'recipes',
+    'javascript array methods', 'linux kernel', 'climate change', 'stock market',
+    'best laptops 2025', 'how to tie a tie', 'world cup', 'machine learning',
+    'postgres index', 'rust vs go', 'coffee shops near me', 'movie times',
+    'translate hello', 'electric cars', 'mars rover', 'bitcoin price',
+    'sourdough starter', 'marathon training', 'css grid', 'docker compose',
+    'kubernetes ingress', 'nasa', 'wikipedia', 'github', 'gunicorn workers',
+    'gevent monkey patch', 'sqlalchemy session', 'requests timeout',
+    'beautifulsoup select', 'vercel python', 'metasearch engine', 'privacy',
+]
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_for(url, timeout=30):
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def process_tree(pid):
+    """Return pid and all descendant pids (Linux /proc)"""
+    pids = [pid]
+    for current in pids:
+        try:
+            with open(f'/proc/{current}/task/{current}/children') as f:
+                pids.extend(int(child) for child in f.read().split())
+        except OSError:
+            pass
+    return pids
+
+
+def sample_processes(pid):
+    """Return (total RSS in MB, total thread count) of a process tree"""
+    rss_kb = threads = 0
+    for current in process_tree(pid):
+        try:
+            with open(f'/proc/{current}/status') as f:
+                for line in f:
+                    if line.startswith('VmRSS:'):
+                        rss_kb += int(line.split()[1])
+                    elif line.startswith('Threads:'):
+                        threads += int(line.split()[1])
+        except OSError:
+            pass
+    return rss_kb / 1024, threads
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return None
+    index = min(len(sorted_values) - 1, int(round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class QueryMix:
+    """Zipf-distributed popular queries plus a share of never-repeated ones"""
+
+    def __init__(self, queries, zipf, unique_ratio, image_ratio):
+        self.queries = queries
+        self.weights = [1 / (rank ** zipf) for rank in range(1, len(queries) + 1)]
+        self.unique_ratio = unique_ratio
+        self.image_ratio = image_ratio
+
+    def next_path(self, rng):
+        if rng.random() < self.unique_ratio:
+            query = 'unique ' + ''.join(rng.choices(string.ascii_lowercase, k=12))
+        else:
+            query = rng.choices(self.queries, weights=self.weights)[0]
+        endpoint = '/api/image-search' if rng.random() < self.image_ratio else '/api/search'
+        return f"{endpoint}?{urllib.parse.urlencode({'q': query})}"
+
+
+def drive_load(base_url, mix, concurrency, duration, server_pid):
+    """Run closed-loop clients against the server and return the measurements"""
+    latencies = []
+    errors = 0
+    lock = threading.Lock()
+    stop_at = time.time() + duration
+    samples = []
+
+    def client(seed):
+        nonlocal errors
+        rng = random.Random(seed)
+        session = requests.Session()
+        while time.time() < stop_at:
+            path = mix.next_path(rng)
+            started = time.perf_counter()
+            try:
+                ok = session.get(base_url + path, timeout=60).ok
+            except requests.RequestException:
+                ok = False
+            elapsed = time.perf_counter() - started
+            with lock:
+                latencies.append(elapsed)
+                if not ok:
+                    errors += 1
+
+    def sampler():
+        while time.time() < stop_at:
+            samples.append(sample_processes(server_pid))
+            time.sleep(0.5)
+
+    threads = [threading.Thread(target=client, args=(i,)) for i in range(concurrency)]
+    threads.append(threading.Thread(target=sampler))
+    started = time.time()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.time() - started
+
+    latencies.sort()
+    rss = [rss for rss, _ in samples] or [0]
+    thread_counts = [count for _, count in samples] or [0]
+    return {
+        'requests': len(latencies),
+        'errors': errors,
+        'throughput_rps': round(len(latencies) / wall, 2),
+        'latency_ms': {
+            'mean': round(statistics.fmean(latencies) * 1000, 1) if latencies else None,
+            'p50': round(percentile(latencies, 50) * 1000, 1) if latencies else None,
+            'p90': round(percentile(latencies, 90) * 1000, 1) if latencies else None,
+            'p99': round(percentile(latencies, 99) * 1000, 1) if latencies else None,
+            'max': round(latencies[-1] * 1000, 1) if latencies else None,
+        },
+        'rss_mb': {'mean': round(statistics.fmean(rss), 1), 'peak': round(max(rss), 1)},
+        'threads': {'mean': round(statistics.fmean(thread_counts), 1), 'peak': max(thread_counts)},
+    }
+
+
+def start_server(worker_class, args, env):
+    port = free_port()
+    command = [sys.executable, '-m', 'gunicorn', 'main:app',
+               '-b', f'127.0.0.1:{port}', '-w', str(args.workers), '-k', worker_class,
+               '--timeout', '120', '--log-level', 'warning']
+    if worker_class == 'gthread':
+        command += ['--threads', str(args.threads)]
+    elif worker_class == 'gevent':
+        command += ['--worker-connections', str(args.worker_connections)]
+
+    process = subprocess.Popen(command, cwd=ROOT, env=env)
+    base_url = f'http://127.0.0.1:{port}'
+    try:
+        wait_for(base_url + '/health')
+    except RuntimeError:
+        process.terminate()
+        raise
+    return process, base_url
+
+
+def run(args):
+    scratch = tempfile.mkdtemp(prefix='colossus-loadtest-')
+    stub_port = free_port()
+    env = dict(
+        os.environ,
+        **engine_url_env(stub_port),
+        DATABASE_URL=f"sqlite:///{os.path.join(scratch, 'loadtest.db')}",
+        LOCAL_INDEX_PATH=os.path.join(scratch, 'index.sqlite3'),
+        THUMBNAIL_CACHE_DIR=os.path.join(scratch, 'thumbnails'),
+        RATE_LIMIT_DB=os.path.join(scratch, 'ratelimit.sqlite3'),
+        CACHE_SNAPSHOT_PATH='',
+        LOG_LEVEL='WARNING',
+    )
+    # The stub shares one host:port, so give it a budget that never throttles
+    for name in ('google', 'bing', 'duckduckgo', 'yahoo', 'brave', 'google_images', 'bing_images'):
+        env[f'RATE_LIMIT_{name.upper()}'] = '100000/100000'
+
+    subprocess.run([sys.executable, 'init_db.py'], cwd=ROOT, env=env, check=True)
+    stub = subprocess.Popen([sys.executable, os.path.join(HERE, 'stub_engines.py'), '--port', str(stub_port),
+                             '--latency', str(args.stub_latency), '--jitter', str(args.stub_jitter)])
+
+    queries = DEFAULT_QUERIES
+    if args.queries:
+        with open(args.queries) as f:
+            queries = [line.strip() for line in f if line.strip()]
+    mix = QueryMix(queries, args.zipf, args.unique_ratio, args.image_ratio)
+
+    runs = []
+    try:
+        wait_for(f'http://127.0.0.1:{stub_port}/google/?q=warmup')
+        for worker_class in args.worker_classes.split(','):
+            if worker_class == 'gevent' and importlib.util.find_spec('gevent') is None:
+                print("Skipping gevent: gevent is not installed")
+                continue
+
+            for concurrency in (int(c) for c in args.concurrency.split(',')):
+                process, base_url = start_server(worker_class, args, env)
+                try:
+                    print(f"{worker_class:8} concurrency={concurrency:<4} ", end='', flush=True)
+                    result = drive_load(base_url, mix, concurrency, args.duration, process.pid)
+                finally:
+                    process.terminate()
+                    process.wait()
+                result.update(worker_class=worker_class, concurrency=concurrency)
+                runs.append(result)
+                print(f"{result['throughput_rps']:>8} req/s  p50={result['latency_ms']['p50']}ms "
+                      f"p99={result['latency_ms']['p99']}ms  errors={result['errors']}  "
+                      f"rss={result['rss_mb']['peak']}MB  threads={result['threads']['peak']}")
+    finally:
+        stub.terminate()
+        stub.wait()
+
+    os.makedirs(RESULTS_DIR, exist_ok=True)
+    run_id = time.strftime('%Y%m%d-%H%M%S')
+    git_rev = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT,
+                             capture_output=True, text=True).stdout.strip()
+    config = {key: value for key, value in vars(args).items() if key != 'compare'}
+    path = os.path.join(RESULTS_DIR, f'{run_id}.json')
+    with open(path, 'w') as f:
+        json.dump({'run_id': run_id, 'git_rev': git_rev, 'config': config, 'runs': runs}, f, indent=2)
+    print(f"Results written to {path}")
+
+
+def compare(paths):
+    """Print stored runs side by side"""
+    if not paths:
+        paths = sorted(
+            os.path.join(RESULTS_DIR, name) for name in os.listdir(RESULTS_DIR) if name.endswith('.json')
+        ) if os.path.isdir(RESULTS_DIR) else []
+
+    print(f"{'run':16} {'rev':8} {'worker':8} {'conc':>5} {'req/s':>9} {'p50 ms':>8} {'p99 ms':>8} "
+          f"{'errors':>7} {'rss MB':>8} {'threads':>8}")
+    for path in paths:
+        with open(path) as f:
+            report = json.load(f)
+        for r in report['runs']:
+            print(f"{report['run_id']:16} {report['git_rev']:8} {r['worker_class']:8} {r['concurrency']:>5} "
+                  f"{r['throughput_rps']:>9} {r['latency_ms']['p50']!s:>8} {r['latency_ms']['p99']!s:>8} "
+                  f"{r['errors']:>7} {r['rss_mb']['peak']:>8} {r['threads']['peak']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--worker-classes', default='sync,gthread,gevent')
+    parser.add_argument('--workers', type=int, default=2, help='gunicorn worker processes')
+    parser.add_argument('--threads', type=int, default=8, help='threads per gthread worker')
+    parser.add_argument('--worker-connections', type=int, default=100, help='connections per gevent worker')
+    parser.add_argument('--concurrency', default='1,8,32', help='comma-separated client counts')
+    parser.add_argument('--duration', type=float, default=20, help='seconds per measurement')
+    parser.add_argument('--queries', help='file with one query per line, most popular first')
+    parser.add_argument('--zipf', type=float, default=1.1, help='skew of the query popularity distribution')
+    parser.add_argument('--unique-ratio', type=float, default=0.1, help='share of never-repeated queries')
+    parser.add_argument('--image-ratio', type=float, default=0.2, help='share of /api/image-search requests')
+    parser.add_argument('--stub-latency', type=float, default=0.15)
+    parser.add_argument('--stub-jitter', type=float, default=0.1)
+    parser.add_argument('--compare', nargs='*', metavar='RESULT_JSON',
+                        help='print stored results (all in loadtest/results/ if none given) instead of running')
+    args = parser.parse_args()
+
+    if args.compare is not None:
+        compare(args.compare)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,107 @@
+"""Local stand-in for the upstream search engines
+
+Serves result pages whose markup matches the selectors in engines.py, under
+/<engine>/?q=<query>, after a configurable delay that mimics upstream
+latency. Results are derived from the query so that engines overlap (which
+exercises de-duplication and ranking) and repeated queries are stable.
+
+    python loadtest/stub_engines.py --port 8900 --latency 0.15 --jitter 0.1
+"""
+import time
+import html
+import random
+import hashlib
+import argparse
+import urllib.parse
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+RESULTS_PER_PAGE = 10
+
+# Markup for one result, per engine, matching the selectors in engines.py
+TEMPLATES = {
+    'google': '<div class="g"><a href="{link}"><h3>{title}</h3></a><div class="VwiC3b">{snippet}</div></div>',
+    'bing': '<li class="b_algo"><h2><a href="{link}">{title}</a></h2><p>{snippet}</p></li>',
+    'duckduckgo': '<div class="result"><a class="result__a" href="{link}">{title}</a>'
+                  '<a class="result__snippet">{snippet}</a></div>',
+    'yahoo': '<div class="algo"><h3><a href="{link}">{title}</a></h3><div class="compText">{snippet}</div></div>',
+    'brave': '<div class="snippet"><div class="snippet-title"><a href="{link}">{title}</a></div>'
+             '<div class="snippet-description">{snippet}</div></div>',
+    'google_images': '<div class="isv-r"><a href="/imgres?u={n}"></a>'
+                     '<img class="rg_i" src="https://images.example.com/{n}.jpg" alt="{title}"></div>',
+    'bing_images': '<div class="imgpt"><a class="iusc" href="/images/{n}"></a>'
+                   '<img class="mimg" src="https://images.example.com/{n}.jpg" alt="{title}"></div>',
+}
+
+
+def render_page(engine, query, offset):
+    """Return a result page for a query; about half the links are shared by all engines"""
+    digest = int(hashlib.md5(f"{query}:{offset}".encode()).hexdigest(), 16) % 1000000
+    items = []
+    for i in range(RESULTS_PER_PAGE):
+        # Even positions are common to every engine, odd ones are engine specific
+        n = f"{digest}-{i}" if i % 2 == 0 else f"{digest}-{engine}-{i}"
+        items.append(TEMPLATES[engine].format(
+            n=n,
+            link=f"https://example.com/{n}",
+            title=html.escape(f"{query} result {i}"),
+            snippet=html.escape(f"About {query}: " + 'lorem ipsum dolor sit amet ' * 8),
+        ))
+    return f"<html><head><title>{html.escape(query)}</title></head><body>{''.join(items)}</body></html>"
+
+
+def make_handler(latency, jitter):
+    class StubEngineHandler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def do_GET(self):
+            parsed = urllib.parse.urlsplit(self.path)
+            engine = parsed.path.strip('/').split('/')[0]
+            params = urllib.parse.parse_qs(parsed.query)
+            query = (params.get('q') or params.get('p') or [''])[0]
+            offset = next((params[key][0] for key in ('start', 'first', 'b', 'offset') if key in params), '0')
+
+            if engine not in TEMPLATES:
+                self.send_error(404)
+                return
+
+            time.sleep(max(0.0, latency + random.uniform(-jitter, jitter)))
+            body = render_page(engine, query, offset).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/html; charset=utf-8')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return StubEngineHandler
+
+
+def engine_url_env(port):
+    """Return ENGINE_URL_<NAME> overrides pointing every engine at the stub"""
+    base = f"http://127.0.0.1:{port}"
+    return {
+        'ENGINE_URL_GOOGLE': base + '/google/?q={query}&start={offset}',
+        'ENGINE_URL_BING': base + '/bing/?q={query}&first={offset}',
+        'ENGINE_URL_DUCKDUCKGO': base + '/duckduckgo/?q={query}',
+        'ENGINE_URL_YAHOO': base + '/yahoo/?p={query}&b={offset}',
+        'ENGINE_URL_BRAVE': base + '/brave/?q={query}&offset={offset}',
+        'ENGINE_URL_GOOGLE_IMAGES': base + '/google_images/?q={query}&start={offset}',
+        'ENGINE_URL_BING_IMAGES': base + '/bing_images/?q={query}&first={offset}',
+    }
+
+
+def serve(port, latency, jitter):
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(latency, jitter))
+    server.daemon_threads = True
+    server.serve_forever()
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8900)
+    parser.add_argument('--latency', type=float, default=0.15, help='mean upstream latency in seconds')
+    parser.add_argument('--jitter', type=float, default=0.1, help='uniform +/- jitter in seconds')
+    args = parser.parse_args()
+    serve(args.port, args.latency, args.jitter)
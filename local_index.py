@@ -0,0 +1,201 @@
+import re
+import time
+import queue
+import sqlite3
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS documents (
+    id INTEGER PRIMARY KEY,
+    link TEXT NOT NULL UNIQUE,
+    title TEXT NOT NULL,
+    snippet TEXT NOT NULL,
+    source TEXT NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS documents_updated ON documents (updated);
+CREATE VIRTUAL TABLE IF NOT EXISTS documents_fts USING fts5(
+    title, snippet, link,
+    content='documents', content_rowid='id',
+    tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS documents_ai AFTER INSERT ON documents BEGIN
+    INSERT INTO documents_fts(rowid, title, snippet, link) VALUES (new.id, new.title, new.snippet, new.link);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_ad AFTER DELETE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, snippet, link)
+    VALUES ('delete', old.id, old.title, old.snippet, old.link);
+END;
+CREATE TRIGGER IF NOT EXISTS documents_au AFTER UPDATE ON documents BEGIN
+    INSERT INTO documents_fts(documents_fts, rowid, title, snippet, link)
+    VALUES ('delete', old.id, old.title, old.snippet, old.link);
+    INSERT INTO documents_fts(rowid, title, snippet, link) VALUES (new.id, new.title, new.snippet, new.link);
+END;
+"""
+
+UPSERT = """
+INSERT INTO documents (link, title, snippet, source, updated) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT(link) DO UPDATE SET
+    title = excluded.title, snippet = excluded.snippet,
+    source = excluded.source, updated = excluded.updated
+"""
+
+# Column weights for bm25(): title, snippet, link
+SEARCH = """
+SELECT d.title, d.link, d.snippet, d.source
+FROM documents_fts JOIN documents d ON d.id = documents_fts.rowid
+WHERE documents_fts MATCH ?
+ORDER BY bm25(documents_fts, 10.0, 2.0, 1.0)
+LIMIT ? OFFSET ?
+"""
+
+# Pruning: drop rows not refreshed within max_age, then the oldest beyond max_rows
+PRUNE_EXPIRED = "DELETE FROM documents WHERE updated < ?"
+PRUNE_EXCESS = """
+DELETE FROM documents WHERE id IN (
+    SELECT id FROM documents ORDER BY updated DESC LIMIT -1 OFFSET ?
+)
+"""
+
+_TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+
+def build_match_expression(query):
+    """Turn free text into an FTS5 query that ANDs every word as a literal term"""
+    return ' '.join(f'"{token}"' for token in _TOKEN_RE.findall(query))
+
+
+class LocalIndex:
+    """On-disk full-text index of web results we have already fetched
+
+    ``add`` only enqueues records; a background writer thread upserts them in
+    batches, so indexing never adds latency to a search request. Lookups use
+    a separate read connection per thread (WAL mode lets them run alongside
+    the writer).
+
+    The writer keeps the file bounded: every ``prune_interval`` seconds it
+    deletes results not seen for ``max_age`` seconds and then the least
+    recently seen beyond ``max_rows`` (0 disables either limit), merges the
+    FTS segments and returns freed pages to the filesystem.
+    """
+
+    def __init__(self, path, enabled=True, batch_size=500, queue_size=10000,
+                 max_rows=100000, max_age=30 * 24 * 3600, prune_interval=300):
+        self.path = path
+        self.batch_size = batch_size
+        self.max_rows = max_rows
+        self.max_age = max_age
+        self.prune_interval = prune_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._local = threading.local()
+        self._writer = None
+        self._writer_lock = threading.Lock()
+        self.available = enabled
+
+    def _connect(self):
+        connection = sqlite3.connect(self.path, timeout=5)
+        # Only takes effect when the file is created; lets prune() shrink it
+        connection.execute('PRAGMA auto_vacuum=INCREMENTAL')
+        connection.execute('PRAGMA journal_mode=WAL')
+        connection.execute('PRAGMA synchronous=NORMAL')
+        connection.executescript(SCHEMA)
+        return connection
+
+    def _reader(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = self._local.connection = self._connect()
+        return connection
+
+    def add(self, results):
+        """Queue web results (dicts with title, link, snippet, source) for indexing"""
+        if not self.available or not results:
+            return
+
+        self._start_writer()
+        now = time.time()
+        records = [
+            (r['link'], r.get('title', ''), r.get('snippet', ''), r.get('source', ''), now)
+            for r in results
+        ]
+        try:
+            self._queue.put_nowait(records)
+        except queue.Full:
+            logger.warning("Local index queue is full, dropping %d results", len(records))
+
+    def search(self, query, limit=10, offset=0):
+        """Return indexed results matching every word of the query, best first"""
+        expression = build_match_expression(query)
+        if not self.available or not expression:
+            return []
+
+        try:
+            rows = self._reader().execute(SEARCH, (expression, limit, offset)).fetchall()
+        except sqlite3.Error as e:
+            logger.error("Local index search for '%s' failed: %s", query, e)
+            return []
+
+        return [
+            {'title': title, 'link': link, 'snippet': snippet, 'source': source, 'local': True}
+            for title, link, snippet, source in rows
+        ]
+
+    def _start_writer(self):
+        if self._writer is not None:
+            return
+        with self._writer_lock:
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._write_loop, name='local-index-writer', daemon=True)
+                self._writer.start()
+
+    def _write_loop(self):
+        try:
+            connection = self._connect()
+        except sqlite3.Error as e:
+            logger.error("Disabling local index at %s: %s", self.path, e)
+            self.available = False
+            return
+
+        last_prune = 0
+        while True:
+            if time.time() - last_prune >= self.prune_interval:
+                self.prune(connection)
+                last_prune = time.time()
+
+            try:
+                batch = self._queue.get(timeout=max(1, self.prune_interval))
+            except queue.Empty:
+                continue
+            while len(batch) < self.batch_size:
+                try:
+                    batch.extend(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+
+            try:
+                with connection:
+                    connection.executemany(UPSERT, batch)
+            except sqlite3.Error as e:
+                logger.error("Failed to index %d results: %s", len(batch), e)
+
+    def prune(self, connection):
+        """Apply max_age and max_rows, returning the number of results removed"""
+        removed = 0
+        try:
+            with connection:
+                if self.max_age:
+                    removed += connection.execute(PRUNE_EXPIRED, (time.time() - self.max_age,)).rowcount
+                if self.max_rows:
+                    removed += connection.execute(PRUNE_EXCESS, (self.max_rows,)).rowcount
+                if removed:
+                    connection.execute("INSERT INTO documents_fts(documents_fts) VALUES ('optimize')")
+            if removed:
+                # executescript steps the pragma to completion (execute() frees a single page)
+                connection.executescript('PRAGMA incremental_vacuum; PRAGMA wal_checkpoint(TRUNCATE);')
+                logger.info("Pruned %d results from the local index", removed)
+        except sqlite3.Error as e:
+            logger.error("Failed to prune the local index: %s", e)
+        return removed
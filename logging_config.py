@@ -0,0 +1,159 @@
+import os
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import logging.handlers
+
+# Attributes every LogRecord carries; anything else was passed via ``extra``
+_RESERVED_ATTRS = set(vars(logging.LogRecord('', 0, '', 0, '', (), None))) | {'message', 'asctime'}
+
+# Guards against configuring the root logger twice (app and scripts both call us)
+_listener = None
+_configure_lock = threading.Lock()
+
+
+class JsonFormatter(logging.Formatter):
+    """Render log records as single-line JSON documents"""
+
+    def format(self, record):
+        entry = {
+            'ts': round(record.created, 3),
+            'level': record.levelname,
+            'logger': record.name,
+            'message': record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RESERVED_ATTRS and not key.startswith('_'):
+                entry[key] = value
+        if record.exc_info:
+            entry['exc_info'] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    """Plain-text formatter that notes how many repeats RateLimitFilter dropped"""
+
+    def format(self, record):
+        message = super().format(record)
+        suppressed = getattr(record, 'suppressed', None)
+        if suppressed:
+            message += f" ({suppressed} similar messages suppressed)"
+        return message
+
+
+class RateLimitFilter(logging.Filter):
+    """Drop repeats of the same warning/error template beyond a per-interval budget
+
+    Records are keyed by logger name and the *unformatted* message, so
+    'Error parsing %s result: %s' counts as one message regardless of its
+    arguments. Once an interval ends, the next record that gets through is
+    annotated with how many were suppressed.
+    """
+
+    def __init__(self, rate=10, interval=60.0, min_level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.interval = interval
+        self.min_level = min_level
+        self._windows = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.min_level:
+            return True
+
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window_start, count, suppressed = self._windows.get(key, (now, 0, 0))
+            if now - window_start >= self.interval:
+                if suppressed:
+                    record.suppressed = suppressed
+                window_start, count, suppressed = now, 0, 0
+
+            if count >= self.rate:
+                self._windows[key] = (window_start, count, suppressed + 1)
+                return False
+
+            self._windows[key] = (window_start, count + 1, suppressed)
+        return True
+
+
+class DeferredQueueHandler(logging.handlers.QueueHandler):
+    """Queue records as-is so message formatting happens on the listener thread"""
+
+    def prepare(self, record):
+        return record
+
+
+def _restart_listener_in_child():
+    """Give a forked child its own log queue and listener thread
+
+    fork() copies the listener but not its thread, so in a child of a
+    pre-forking server (gunicorn --preload) records would pile up in the
+    queue unwritten. Locks another thread held at the time of the fork are
+    also replaced, since nothing in the child would ever release them.
+    """
+    if _listener is None:
+        return
+    log_queue = queue.SimpleQueue()
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, DeferredQueueHandler):
+            handler.queue = log_queue
+            for log_filter in handler.filters:
+                if isinstance(log_filter, RateLimitFilter):
+                    log_filter._lock = threading.Lock()
+    _listener.queue = log_queue
+    _listener._thread = None
+    _listener.start()
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_restart_listener_in_child)
+
+
+def configure_logging():
+    """Configure root logging from the environment
+
+    Handlers do the formatting and the stderr write on a background thread
+    fed by a queue, so request threads only pay for enqueueing a record.
+
+    Environment variables:
+        LOG_LEVEL: level name for the root logger (default INFO)
+        LOG_FORMAT: 'json' (default) or 'text'
+        LOG_RATE_LIMIT: repeated warnings/errors allowed per interval (default 10)
+        LOG_RATE_INTERVAL: rate limit interval in seconds (default 60)
+    """
+    global _listener
+
+    with _configure_lock:
+        if _listener is not None:
+            return
+
+        level = os.environ.get('LOG_LEVEL', 'INFO').upper()
+
+        if os.environ.get('LOG_FORMAT', 'json').lower() == 'text':
+            formatter = TextFormatter('%(asctime)s %(levelname)s %(name)s: %(message)s')
+        else:
+            formatter = JsonFormatter()
+
+        stream_handler = logging.StreamHandler()
+        stream_handler.setFormatter(formatter)
+
+        log_queue = queue.SimpleQueue()
+        queue_handler = DeferredQueueHandler(log_queue)
+        queue_handler.addFilter(RateLimitFilter(
+            rate=int(os.environ.get('LOG_RATE_LIMIT', 10)),
+            interval=float(os.environ.get('LOG_RATE_INTERVAL', 60)),
+        ))
+
+        root = logging.getLogger()
+        root.handlers[:] = [queue_handler]
+        root.setLevel(level)
+
+        _listener = logging.handlers.QueueListener(log_queue, stream_handler, respect_handler_level=True)
+        _listener.start()
+        atexit.register(_listener.stop)
@@ -0,0 +1,122 @@
+import os
+import logging
+import threading
+import concurrent.futures
+
+logger = logging.getLogger(__name__)
+
+# Longest we wait for a worker process to parse one page, in seconds
+PARSE_TIMEOUT = 10
+
+
+def _warm_worker():
+    """Import the parser and compile every engine's selectors once per worker process"""
+    from engines import ENGINES
+    from search_engine import compile_selector
+    import bs4  # noqa: F401
+
+    for spec in ENGINES.values():
+        compile_selector(spec.container)
+        for field in spec.fields.values():
+            if field.selector is not None:
+                compile_selector(field.selector)
+
+
+def _parse_in_worker(engine_name, body, encoding):
+    from engines import ENGINES
+    from search_engine import extract_records
+    return extract_records(ENGINES[engine_name], body, encoding)
+
+
+class ParsePool:
+    """Parse result pages in a long-lived pool of worker processes
+
+    Fetch threads hand over the raw response bytes and the engine name and
+    get back compact tuples of field values, so parsing runs on every core
+    instead of queueing on the web worker's GIL behind other requests'
+    parsing. The engine spec is looked up by name in the worker because its
+    field cleaners are not picklable. With ``workers=0`` pages are parsed
+    inline in the calling thread, as before.
+
+    The processes are started on first use, so pre-forking servers create
+    one pool per web worker after the fork. If a worker process dies the
+    pool is replaced and the page is parsed inline.
+    """
+
+    def __init__(self, workers=0, timeout=PARSE_TIMEOUT):
+        self.workers = workers
+        self.timeout = timeout
+        self._executor = None
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    # Imported here so processes that parse inline never load multiprocessing
+                    import multiprocessing
+                    from concurrent.futures import ProcessPoolExecutor
+
+                    # The web worker runs threads, which fork() does not mix well with
+                    methods = multiprocessing.get_all_start_methods()
+                    context = multiprocessing.get_context('forkserver' if 'forkserver' in methods else 'spawn')
+                    self._executor = ProcessPoolExecutor(
+                        max_workers=self.workers,
+                        mp_context=context,
+                        initializer=_warm_worker,
+                    )
+                    logger.info("Started %d parser processes", self.workers)
+        return self._executor
+
+    def _reset(self, executor):
+        with self._lock:
+            if self._executor is executor:
+                self._executor = None
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    def parse_records(self, spec, body, encoding=None):
+        """Return the field tuples of a result page, parsed in a worker process"""
+        from search_engine import extract_records
+        from concurrent.futures.process import BrokenProcessPool
+
+        if not self.workers:
+            return extract_records(spec, body, encoding)
+
+        executor = self._get_executor()
+        try:
+            return executor.submit(_parse_in_worker, spec.name, body, encoding).result(timeout=self.timeout)
+        except BrokenProcessPool:
+            logger.error("Parser process pool broke while parsing %s results, restarting it", spec.label)
+            self._reset(executor)
+            return extract_records(spec, body, encoding)
+        except concurrent.futures.TimeoutError:
+            logger.error("Timed out parsing %s results", spec.label)
+            return []
+
+    def parse(self, spec, body, encoding=None):
+        """Parse a result page into result dicts"""
+        from search_engine import results_from_records
+        return results_from_records(spec, self.parse_records(spec, body, encoding))
+
+    def shutdown(self):
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+_parse_pool = None
+_parse_pool_lock = threading.Lock()
+
+
+def get_parse_pool():
+    """Return the shared parse pool, sized by PARSE_WORKERS (0, the default, parses inline)"""
+    global _parse_pool
+    if _parse_pool is None:
+        with _parse_pool_lock:
+            if _parse_pool is None:
+                workers = os.environ.get('PARSE_WORKERS', '0').strip().lower()
+                if workers == 'auto':
+                    workers = os.cpu_count() or 1
+                _parse_pool = ParsePool(int(workers or 0))
+    return _parse_pool
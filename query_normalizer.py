@@ -0,0 +1,88 @@
+import os
+import threading
+import unicodedata
+from collections import OrderedDict
+
+_stop_tokens = None
+
+
+def get_stop_tokens():
+    """Return the tokens dropped from queries, from the comma-separated QUERY_STOP_TOKENS"""
+    global _stop_tokens
+    if _stop_tokens is None:
+        tokens = (unicodedata.normalize('NFKC', token).casefold().strip()
+                  for token in os.environ.get('QUERY_STOP_TOKENS', '').split(','))
+        _stop_tokens = frozenset(token for token in tokens if token)
+    return _stop_tokens
+
+
+def normalize_query(query):
+    """Return the canonical form of a search query
+
+    NFKC folds compatibility characters (full-width letters, ligatures,
+    non-breaking spaces) into their plain forms, casefold() lowercases
+    more thoroughly than lower() (e.g. 'ß' -> 'ss'), and whitespace runs
+    collapse to single spaces. Stop tokens are dropped unless nothing else
+    is left. "Python", " python " and "ＰＹＴＨＯＮ" all become "python".
+    """
+    tokens = unicodedata.normalize('NFKC', query).casefold().split()
+    stop_tokens = get_stop_tokens()
+    if stop_tokens:
+        tokens = [token for token in tokens if token not in stop_tokens] or tokens
+    return ' '.join(tokens)
+
+
+def clean_query(query):
+    """Return a query as it is sent to the search engines
+
+    Only NFKC normalization and whitespace collapsing are applied: case and
+    stop tokens are kept, since engines can treat them as meaningful (a
+    quoted "The Who", say). normalize_query() is for cache keys, search
+    history and suggestions.
+    """
+    return ' '.join(unicodedata.normalize('NFKC', query).split())
+
+
+class NormalizationStats:
+    """Cache hit counters that separate hits gained by query normalization
+
+    For every cache key we remember (boundedly) which raw queries have
+    looked it up. A hit for a raw query not seen before on that key would
+    have been a miss without normalization, so it counts as gained.
+    """
+
+    def __init__(self, max_keys=1000):
+        self.max_keys = max_keys
+        self.lookups = 0
+        self.hits = 0
+        self.normalized_hits = 0
+        self._raw_forms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def record(self, key, raw_query, hit):
+        """Count one cache lookup of ``key`` made for ``raw_query``"""
+        with self._lock:
+            self.lookups += 1
+            forms = self._raw_forms.get(key)
+            if hit:
+                self.hits += 1
+                if forms is not None and raw_query not in forms:
+                    self.normalized_hits += 1
+
+            if forms is None:
+                forms = self._raw_forms[key] = set()
+            forms.add(raw_query)
+            self._raw_forms.move_to_end(key)
+            while len(self._raw_forms) > self.max_keys:
+                self._raw_forms.popitem(last=False)
+
+    def as_dict(self):
+        with self._lock:
+            lookups, hits, gained = self.lookups, self.hits, self.normalized_hits
+        return {
+            'lookups': lookups,
+            'hits': hits,
+            'normalized_hits': gained,
+            'hit_rate': round(hits / lookups, 4) if lookups else 0.0,
+            'raw_hit_rate': round((hits - gained) / lookups, 4) if lookups else 0.0,
+        }
@@ -0,0 +1,138 @@
+import os
+import time
+import sqlite3
+import logging
+import tempfile
+import threading
+
+logger = logging.getLogger(__name__)
+
+# How long a caller may be queued behind other requests to the same engine
+MAX_WAIT = float(os.environ.get('RATE_LIMIT_MAX_WAIT', 0.5))
+
+
+class RateLimitExceeded(Exception):
+    """Raised when an engine's outbound budget is exhausted"""
+
+
+class MemoryBackend:
+    """Token buckets shared by the threads of one process"""
+
+    def __init__(self):
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def reserve(self, key, rate, burst, max_wait):
+        """Take a token from a bucket, returning how long to wait for it
+
+        The bucket may go into debt by up to ``rate * max_wait`` tokens, which
+        is what queues callers behind each other. Returns None (and takes
+        nothing) when the wait would exceed ``max_wait``.
+        """
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.get(key, (burst, now))
+            tokens, delay = _take(tokens, updated, now, rate, burst, max_wait)
+            if delay is None:
+                return None
+            self._buckets[key] = (tokens, now)
+        return delay
+
+
+class SqliteBackend:
+    """Token buckets in a local SQLite file, shared by every worker on the host"""
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+
+    def _connection(self):
+        connection = getattr(self._local, 'connection', None)
+        if connection is None:
+            connection = sqlite3.connect(self.path, timeout=5, isolation_level=None)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS buckets '
+                '(key TEXT PRIMARY KEY, tokens REAL NOT NULL, updated REAL NOT NULL)'
+            )
+            self._local.connection = connection
+        return connection
+
+    def reserve(self, key, rate, burst, max_wait):
+        """Take a token from a bucket, returning how long to wait for it (see MemoryBackend)"""
+        connection = self._connection()
+        connection.execute('BEGIN IMMEDIATE')
+        try:
+            now = time.time()
+            row = connection.execute('SELECT tokens, updated FROM buckets WHERE key = ?', (key,)).fetchone()
+            tokens, updated = row if row else (burst, now)
+            tokens, delay = _take(tokens, updated, now, rate, burst, max_wait)
+            if delay is not None:
+                connection.execute(
+                    'INSERT OR REPLACE INTO buckets (key, tokens, updated) VALUES (?, ?, ?)',
+                    (key, tokens, now)
+                )
+            connection.execute('COMMIT')
+        except Exception:
+            connection.execute('ROLLBACK')
+            raise
+        return delay
+
+
+def _take(tokens, updated, now, rate, burst, max_wait):
+    """Refill a bucket and take one token; returns (tokens, delay) or (tokens, None)"""
+    tokens = min(burst, tokens + (now - updated) * rate) - 1
+    delay = max(0.0, -tokens / rate)
+    if delay > max_wait:
+        return tokens + 1, None
+    return tokens, delay
+
+
+def _create_backend():
+    if os.environ.get('RATE_LIMIT_BACKEND', 'memory') == 'sqlite':
+        path = os.environ.get(
+            'RATE_LIMIT_DB',
+            os.path.join(tempfile.gettempdir(), 'colossus-ratelimit.sqlite3')
+        )
+        return SqliteBackend(path)
+    return MemoryBackend()
+
+
+_backend = _create_backend()
+
+
+def get_budget(spec):
+    """Return (requests per second, burst) for an engine spec
+
+    RATE_LIMIT_<ENGINE>=<rate>/<burst>, e.g. RATE_LIMIT_GOOGLE=0.5/5,
+    overrides the spec's defaults. The rate must be positive and the burst
+    at least 1; other overrides are ignored.
+    """
+    override = os.environ.get(f'RATE_LIMIT_{spec.name.upper()}')
+    if override:
+        try:
+            rate, burst = (float(value) for value in override.split('/'))
+            if rate > 0 and burst >= 1:
+                return rate, burst
+        except ValueError:
+            pass
+        logger.error("Ignoring malformed RATE_LIMIT_%s=%r", spec.name.upper(), override)
+    return spec.rate_limit, spec.burst
+
+
+def acquire(spec, max_wait=None):
+    """Wait for permission to send one request to an engine
+
+    Each engine has its own bucket, keyed by engine name, so the bucket's
+    state always matches the budget it is refilled with; engines on the
+    same host (Google web and Google images) are limited separately.
+    Returns False without waiting when the budget is exhausted for longer
+    than ``max_wait`` seconds.
+    """
+    rate, burst = get_budget(spec)
+    delay = _backend.reserve(spec.name, rate, burst, MAX_WAIT if max_wait is None else max_wait)
+    if delay is None:
+        return False
+    if delay > 0:
+        time.sleep(delay)
+    return True
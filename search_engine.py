@@ -1,18 +1,23 @@
-import requests
+import os
 import logging
 import time
 import random
-import urllib.parse
+import threading
+import importlib.util
 import concurrent.futures
-from bs4 import BeautifulSoup
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+import rate_limiter
+from engines import ENGINES, get_engine_names
+from domain_classifier import classify_url
+from parse_pool import get_parse_pool
+from rate_limiter import RateLimitExceeded
 
-# Configure logging
-logging.basicConfig(level=logging.DEBUG)
 logger = logging.getLogger(__name__)
 
-# Constants for requests
-REQUEST_TIMEOUT = 10  # seconds
+# lxml parses several times faster than the pure-Python parser; it ships with
+# trafilatura but is not a hard requirement
+HTML_PARSER = 'lxml' if importlib.util.find_spec('lxml') else 'html.parser'
 
 # User agent rotation list to avoid being detected as a bot
 USER_AGENTS = [
@@ -29,343 +34,318 @@ def get_random_user_agent():
 
 def get_available_engines():
     """Return a list of available search engines"""
-    return [
-        'google',
-        'bing',
-        'duckduckgo',
-        'yahoo',
-        'brave'
-    ]
-
-def search_google(query, page=1):
-    """Search Google and return parsed results"""
-    results = []
-    start = (page - 1) * 10
-    
-    url = f"https://www.google.com/search?q={urllib.parse.quote(query)}&start={start}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.google.com/'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=REQUEST_TIMEOUT)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Google search results are in <div class="g">
-        for div in soup.select('div.g'):
-            try:
-                # Extract link and title
-                link_elem = div.select_one('a')
-                if not link_elem:
-                    continue
-                
-                link = link_elem.get('href', '')
-                if link and isinstance(link, str) and link.startswith('/url?q='):
-                    link = link.split('/url?q=')[1].split('&')[0]
-                
-                if not link or not isinstance(link, str) or not link.startswith(('http://', 'https://')):
-                    continue
-                
-                title_elem = div.select_one('h3')
-                title = title_elem.get_text() if title_elem else 'No title'
-                
-                # Extract snippet/description
-                snippet_elem = div.select_one('div.VwiC3b')
-                snippet = snippet_elem.get_text() if snippet_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'snippet': snippet,
-                    'source': 'google'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Google result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching Google results: {str(e)}")
-    
-    return results
+    return get_engine_names('web')
 
-def search_bing(query, page=1):
-    """Search Bing and return parsed results"""
-    results = []
-    first = (page - 1) * 10 + 1
-    
-    url = f"https://www.bing.com/search?q={urllib.parse.quote(query)}&first={first}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.bing.com/'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Bing search results are in <li class="b_algo">
-        for li in soup.select('li.b_algo'):
-            try:
-                # Extract link and title
-                link_elem = li.select_one('h2 a')
-                if not link_elem:
-                    continue
-                
-                link = link_elem.get('href', '')
-                title = link_elem.get_text()
-                
-                if not link or not isinstance(link, str) or not link.startswith(('http://', 'https://')):
-                    continue
-                
-                # Extract snippet/description
-                snippet_elem = li.select_one('p')
-                snippet = snippet_elem.get_text() if snippet_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'snippet': snippet,
-                    'source': 'bing'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Bing result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching Bing results: {str(e)}")
-    
-    return results
+# One HTTP session shared by every engine so connections to each upstream are reused
+_http_session = None
+_http_session_lock = threading.Lock()
 
-def search_duckduckgo(query, page=1):
-    """Search DuckDuckGo and return parsed results"""
-    results = []
-    
-    # DuckDuckGo doesn't have traditional pagination, but we can use the vqd parameter
-    # This is a simplified version, real implementation would be more complex
-    url = f"https://html.duckduckgo.com/html/?q={urllib.parse.quote(query)}"
-    
+# Compiled CSS selectors, keyed by selector string
+_compiled_selectors = {}
+
+# One bounded pool runs every interactive engine request in the process, so
+# concurrent searches share SEARCH_WORKERS threads rather than each starting
+# their own. Batch searches get a separate BATCH_WORKERS pool so a large batch
+# cannot queue ahead of interactive searches.
+_search_executor = None
+_batch_executor = None
+_search_executor_lock = threading.Lock()
+
+# Engine requests currently running, by (kind, engine, query, page), as
+# (future, executor); identical requests made meanwhile wait on the same
+# future instead of fetching again
+_in_flight = {}
+_in_flight_lock = threading.Lock()
+
+# Threads in the batch search pool
+BATCH_WORKERS = int(os.environ.get('BATCH_WORKERS', 4))
+
+# Longest a search waits for its engines, in seconds
+ENGINE_TIMEOUT = 15
+
+# Last successful results per (engine, query, page), served when an engine's
+# rate limit budget is exhausted
+ENGINE_RESULTS_CACHE_SIZE = 256
+_engine_results = OrderedDict()
+_engine_results_lock = threading.Lock()
+
+def get_http_session():
+    """Return the shared requests session, creating it on first use
+
+    The session is shared for connection pooling only: its cookie jar
+    accepts nothing, so cookies set by one engine response are never sent
+    with later requests made on behalf of other users.
+    """
+    global _http_session
+    if _http_session is None:
+        with _http_session_lock:
+            if _http_session is None:
+                import http.cookiejar
+                import requests
+                session = requests.Session()
+                session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+                adapter = requests.adapters.HTTPAdapter(pool_connections=len(ENGINES), pool_maxsize=10)
+                session.mount('https://', adapter)
+                session.mount('http://', adapter)
+                _http_session = session
+    return _http_session
+
+def get_search_executor():
+    """Return the shared engine request pool, sized by SEARCH_WORKERS (default 8)"""
+    global _search_executor
+    if _search_executor is None:
+        with _search_executor_lock:
+            if _search_executor is None:
+                _search_executor = ThreadPoolExecutor(
+                    max_workers=int(os.environ.get('SEARCH_WORKERS', 8)),
+                    thread_name_prefix='search'
+                )
+    return _search_executor
+
+def get_batch_executor():
+    """Return the engine request pool used by batch searches, sized by BATCH_WORKERS (default 4)"""
+    global _batch_executor
+    if _batch_executor is None:
+        with _search_executor_lock:
+            if _batch_executor is None:
+                _batch_executor = ThreadPoolExecutor(
+                    max_workers=BATCH_WORKERS,
+                    thread_name_prefix='batch-search'
+                )
+    return _batch_executor
+
+def submit_engine_search(name, query, page=1, executor=None, kind='web'):
+    """Schedule one engine request and return its future
+
+    ``kind`` is the kind of search the caller is running ('web' or
+    'image'); an engine of the other kind is reported as unknown rather
+    than fetched. Requests run on the interactive pool unless another
+    executor is given.
+    If the same engine is already being asked for the same query and page,
+    the future of that request is returned instead, provided it was queued
+    on the same executor or has already started (so an interactive search
+    never waits behind a batch's queue).
+    """
+    executor = executor or get_search_executor()
+    key = (kind, name, query, page)
+    with _in_flight_lock:
+        entry = _in_flight.get(key)
+        if entry is not None and (entry[1] is executor or entry[0].running()):
+            return entry[0]
+        search = search_engine if kind == 'web' else image_search_engine
+        future = executor.submit(search, name, query, page)
+        _in_flight[key] = (future, executor)
+
+    def forget(done):
+        with _in_flight_lock:
+            entry = _in_flight.get(key)
+            if entry is not None and entry[0] is done:
+                del _in_flight[key]
+
+    future.add_done_callback(forget)
+    return future
+
+def submit_engine_searches(query, engines, page=1, executor=None, kind='web'):
+    """Schedule a query on several engines, returning {engine: future}"""
+    return {engine: submit_engine_search(engine, query, page, executor, kind) for engine in engines}
+
+def collect_engine_results(futures, started, kind='web'):
+    """Wait for engine futures, returning (results, failed engines, throttled engines)
+
+    Every engine shares the same deadline, ENGINE_TIMEOUT seconds after
+    ``started``. Results are copied, since in-flight requests can be shared
+    between searches.
+    """
+    label = 'search' if kind == 'web' else 'image search'
+    all_results = []
+    error_engines = []
+    throttled_engines = []
+    deadline = started + ENGINE_TIMEOUT
+
+    for engine, future in futures.items():
+        try:
+            results = future.result(timeout=max(0, deadline - time.time()))
+            if results:
+                all_results.extend(dict(result) for result in results)
+            else:
+                logger.warning("No results from %s%s, marking as error", engine, '' if kind == 'web' else ' image search')
+                error_engines.append(engine)
+        except RateLimitExceeded:
+            logger.warning("Rate limit reached for %s %s, skipping", engine, label)
+            throttled_engines.append(engine)
+        except concurrent.futures.TimeoutError:
+            logger.error("Timeout occurred with %s %s", engine, label)
+            error_engines.append(engine)
+        except Exception as e:
+            logger.error("Error with %s %s: %s", engine, label, e)
+            error_engines.append(engine)
+
+    return all_results, error_engines, throttled_engines
+
+def compile_selector(selector):
+    """Return a compiled soupsieve pattern for a CSS selector"""
+    pattern = _compiled_selectors.get(selector)
+    if pattern is None:
+        import soupsieve
+        pattern = _compiled_selectors[selector] = soupsieve.compile(selector)
+    return pattern
+
+def fetch_engine_page(spec, query, page=1):
+    """Fetch the raw result page for an engine spec
+
+    Returns the undecoded body and the charset from the response headers
+    (None if there was none, in which case the parser sniffs it), so
+    decoding happens wherever the page is parsed.
+    """
     headers = {
         'User-Agent': get_random_user_agent(),
         'Accept': 'text/html,application/xhtml+xml,application/xml',
         'Accept-Language': 'en-US,en;q=0.9'
     }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # DuckDuckGo search results are in <div class="result">
-        for div in soup.select('.result'):
-            try:
-                # Extract link and title
-                link_elem = div.select_one('.result__a')
-                if not link_elem:
-                    continue
-                
-                link = link_elem.get('href', '')
-                title = link_elem.get_text()
-                
-                # DuckDuckGo uses redirects, so we need to extract the real URL
-                if link and isinstance(link, str) and '//duckduckgo.com/l/?' in link:
-                    parsed_url = urllib.parse.urlparse(link)
-                    query_params = urllib.parse.parse_qs(parsed_url.query)
-                    if 'uddg' in query_params:
-                        link = query_params['uddg'][0]
-                
-                if not link or not isinstance(link, str) or not link.startswith(('http://', 'https://')):
-                    continue
-                
-                # Extract snippet/description
-                snippet_elem = div.select_one('.result__snippet')
-                snippet = snippet_elem.get_text() if snippet_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'snippet': snippet,
-                    'source': 'duckduckgo'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing DuckDuckGo result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching DuckDuckGo results: {str(e)}")
-    
-    return results
+    if spec.referer:
+        headers['Referer'] = spec.referer
+
+    response = get_http_session().get(spec.build_url(query, page), headers=headers, timeout=spec.timeout)
+    response.raise_for_status()
+    encoding = response.encoding if 'charset' in response.headers.get('Content-Type', '').lower() else None
+    return response.content, encoding
+
+def extract_field(container, field):
+    """Extract one field value from a result container, or None if missing"""
+    element = container if field.selector is None else compile_selector(field.selector).select_one(container)
+    if element is None:
+        return None
+
+    if field.attr is None:
+        value = element.get_text()
+    else:
+        value = element.get(field.attr) or (field.fallback_attr and element.get(field.fallback_attr))
+        if not value or not isinstance(value, str):
+            return None
+
+    if field.prefix:
+        value = field.prefix + value
+    if field.clean:
+        value = field.clean(value)
+    return value
+
+def extract_records(spec, body, encoding=None):
+    """Parse a result page with an engine spec's selectors into tuples of field values
+
+    Values are in the order of spec.fields; results_from_records() turns
+    them into result dicts. Keeping the records this compact matters when
+    they are sent back from a parser process.
+    """
+    from bs4 import BeautifulSoup
+
+    if encoding and isinstance(body, bytes):
+        soup = BeautifulSoup(body, HTML_PARSER, from_encoding=encoding)
+    else:
+        soup = BeautifulSoup(body, HTML_PARSER)
+    records = []
 
-def search_yahoo(query, page=1):
-    """Search Yahoo and return parsed results"""
+    for container in compile_selector(spec.container).select(soup):
+        try:
+            record = []
+            for field in spec.fields.values():
+                value = extract_field(container, field)
+                if value is None:
+                    value = field.default
+                if value is None:
+                    break
+                record.append(value)
+            else:
+                records.append(tuple(record))
+        except Exception as e:
+            logger.error("Error parsing %s result: %s", spec.label, e)
+            continue
+
+    return records
+
+def results_from_records(spec, records):
+    """Turn field tuples from extract_records() into result dicts"""
     results = []
-    b = (page - 1) * 10 + 1
-    
-    url = f"https://search.yahoo.com/search?p={urllib.parse.quote(query)}&b={b}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://search.yahoo.com/'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Yahoo search results are in <div class="algo">
-        for div in soup.select('div.algo'):
-            try:
-                # Extract link and title
-                link_elem = div.select_one('h3 a')
-                if not link_elem:
-                    continue
-                
-                link = link_elem.get('href', '')
-                title = link_elem.get_text()
-                
-                if not link or not isinstance(link, str) or not link.startswith(('http://', 'https://')):
-                    continue
-                
-                # Extract snippet/description
-                snippet_elem = div.select_one('.compText')
-                snippet = snippet_elem.get_text() if snippet_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'snippet': snippet,
-                    'source': 'yahoo'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Yahoo result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching Yahoo results: {str(e)}")
-    
+    for record in records:
+        result = dict(zip(spec.fields, record))
+        result.update(spec.constants)
+        results.append(result)
     return results
 
-def search_brave(query, page=1):
-    """Search Brave Search and return parsed results"""
-    results = []
-    offset = (page - 1) * 10
-    
-    url = f"https://search.brave.com/search?q={urllib.parse.quote(query)}&offset={offset}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9'
-    }
-    
+def remember_engine_results(key, results):
+    """Store an engine's results for rate-limit fallback, evicting the oldest"""
+    with _engine_results_lock:
+        _engine_results[key] = results
+        _engine_results.move_to_end(key)
+        while len(_engine_results) > ENGINE_RESULTS_CACHE_SIZE:
+            _engine_results.popitem(last=False)
+
+def run_engine(spec, query, page=1):
+    """Fetch and parse one page of results from an engine spec
+
+    Raises RateLimitExceeded if the engine's host is over budget and there
+    are no earlier results for the same query to fall back on.
+    """
+    import requests
+
+    key = (spec.name, query, page)
+    if not rate_limiter.acquire(spec):
+        with _engine_results_lock:
+            cached = _engine_results.get(key)
+        if cached is None:
+            raise RateLimitExceeded(spec.name)
+        logger.info("Rate limit reached for %s, serving earlier results for '%s'", spec.label, query)
+        return cached
+
     try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Brave search results are in <div class="snippet">
-        for div in soup.select('.snippet'):
-            try:
-                # Extract link and title
-                link_elem = div.select_one('.snippet-title a')
-                if not link_elem:
-                    continue
-                
-                link = link_elem.get('href', '')
-                title = link_elem.get_text()
-                
-                if not link or not isinstance(link, str) or not link.startswith(('http://', 'https://')):
-                    continue
-                
-                # Extract snippet/description
-                snippet_elem = div.select_one('.snippet-description')
-                snippet = snippet_elem.get_text() if snippet_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'link': link,
-                    'snippet': snippet,
-                    'source': 'brave'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Brave result: {str(e)}")
-                continue
-                
+        body, encoding = fetch_engine_page(spec, query, page)
     except requests.RequestException as e:
-        logger.error(f"Error fetching Brave results: {str(e)}")
-    
+        logger.error("Error fetching %s results: %s", spec.label, e)
+        return []
+
+    # Network I/O stays on this thread; parsing goes to the parse pool when one is configured
+    results = get_parse_pool().parse(spec, body, encoding)
+    if results:
+        remember_engine_results(key, results)
     return results
 
 def search_engine(name, query, page=1):
     """Search using the specified engine"""
-    engine_functions = {
-        'google': search_google,
-        'bing': search_bing,
-        'duckduckgo': search_duckduckgo,
-        'yahoo': search_yahoo,
-        'brave': search_brave
-    }
-    
-    if name not in engine_functions:
-        logger.error(f"Unknown search engine: {name}")
+    spec = ENGINES.get(name)
+    if spec is None or spec.kind != 'web':
+        logger.error("Unknown search engine: %s", name)
         return []
     
     try:
-        return engine_functions[name](query, page)
+        return run_engine(spec, query, page)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
-        logger.error(f"Error searching {name} for '{query}': {str(e)}")
+        logger.error("Error searching %s for '%s': %s", name, query, e)
         return []
 
+def tag_categories(results):
+    """Tag each result with its category (news, video, shopping, reference or web)
+
+    Returns the number of results per category.
+    """
+    category_counts = {}
+    for result in results:
+        category = result['category'] = classify_url(result['link'])
+        category_counts[category] = category_counts.get(category, 0) + 1
+    return category_counts
+
 def search_all_engines(query, engines=None, page=1):
     """Search all specified engines concurrently and aggregate results"""
     if engines is None:
         engines = get_available_engines()
     
     start_time = time.time()
-    all_results = []
-    error_engines = []
-    
-    # Limit the maximum concurrent searches to prevent overwhelming the Vercel instance
-    max_workers = min(len(engines), 3)
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Create a dict of {future: engine_name} to keep track of which future belongs to which engine
-        future_to_engine = {
-            executor.submit(search_engine, engine, query, page): engine for engine in engines
-        }
-        
-        for future in as_completed(future_to_engine):
-            engine = future_to_engine[future]
-            try:
-                # Set a timeout for each search future to ensure we don't hang indefinitely
-                results = future.result(timeout=15)
-                if results:
-                    all_results.extend(results)
-                else:
-                    logger.warning(f"No results from {engine}, marking as error")
-                    error_engines.append(engine)
-            except concurrent.futures.TimeoutError:
-                logger.error(f"Timeout occurred with {engine} search")
-                error_engines.append(engine)
-            except Exception as e:
-                logger.error(f"Error with {engine} search: {str(e)}")
-                error_engines.append(engine)
+    futures = submit_engine_searches(query, engines, page)
+    return merge_engine_results(query, engines, futures, start_time)
+
+def merge_engine_results(query, engines, futures, start_time):
+    """Wait for a query's engine futures and build the de-duplicated, ranked response"""
+    all_results, error_engines, throttled_engines = collect_engine_results(futures, start_time)
     
     # Remove duplicate results based on URL
     unique_results = {}
@@ -385,6 +365,8 @@ def search_all_engines(query, engines=None, page=1):
     # Sort by the number of engines that returned each result (descending)
     results_list.sort(key=lambda x: url_counts.get(x['link'], 0), reverse=True)
     
+    category_counts = tag_categories(results_list)
+    
     elapsed_time = time.time() - start_time
     
     return {
@@ -392,155 +374,34 @@ def search_all_engines(query, engines=None, page=1):
         'results': results_list,
         'all_results': results_list,  # Adding all_results key to match frontend expectations
         'count': len(results_list),
+        'categories': category_counts,
         'engines': {
             'requested': engines,
-            'successful': [e for e in engines if e not in error_engines],
-            'failed': error_engines
+            'successful': [e for e in engines if e not in error_engines and e not in throttled_engines],
+            'failed': error_engines,
+            'throttled': throttled_engines
         },
         'time': round(elapsed_time, 2)
     }
 
-def google_image_search(query, page=1):
-    """Search Google Images and return parsed results"""
-    results = []
-    start = (page - 1) * 20  # Google image search typically shows more results per page
-    
-    url = f"https://www.google.com/search?q={urllib.parse.quote(query)}&tbm=isch&start={start}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.google.com/'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Get all image containers
-        # Note: Google's structure changes frequently, so this might need updates
-        for img_container in soup.select('div.isv-r'):
-            try:
-                # Find the image element
-                img_elem = img_container.select_one('img.rg_i')
-                if not img_elem:
-                    continue
-                
-                # Extract the image URL
-                img_url = img_elem.get('src', '')
-                if not img_url:
-                    img_url = img_elem.get('data-src', '')
-                
-                if not img_url:
-                    continue
-                    
-                # Try to get the full-size image URL from attributes
-                img_link = img_container.select_one('a')
-                full_page_url = f"https://www.google.com{img_link.get('href')}" if img_link else ''
-                
-                # Extract title/alt text
-                title = img_elem.get('alt', 'No title available')
-                
-                results.append({
-                    'title': title,
-                    'thumbnail': img_url,
-                    'image_url': full_page_url,
-                    'source': 'google_images',
-                    'type': 'image'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Google Image result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching Google Image results: {str(e)}")
-    
-    return results
-
-def bing_image_search(query, page=1):
-    """Search Bing Images and return parsed results"""
-    results = []
-    first = (page - 1) * 20 + 1
-    
-    url = f"https://www.bing.com/images/search?q={urllib.parse.quote(query)}&first={first}"
-    
-    headers = {
-        'User-Agent': get_random_user_agent(),
-        'Accept': 'text/html,application/xhtml+xml,application/xml',
-        'Accept-Language': 'en-US,en;q=0.9',
-        'Referer': 'https://www.bing.com/'
-    }
-    
-    try:
-        response = requests.get(url, headers=headers, timeout=5)
-        response.raise_for_status()
-        
-        soup = BeautifulSoup(response.text, 'html.parser')
-        
-        # Bing image results are in divs with class 'imgpt'
-        for img_div in soup.select('.imgpt'):
-            try:
-                # Find the image element
-                img_elem = img_div.select_one('img.mimg')
-                if not img_elem:
-                    continue
-                
-                # Extract the image URL
-                img_url = img_elem.get('src', '')
-                if not img_url:
-                    img_url = img_elem.get('data-src', '')
-                
-                if not img_url:
-                    continue
-                
-                # Extract title/alt text
-                title = img_elem.get('alt', 'No title available')
-                
-                # Get the link to the full-size image
-                link_elem = img_div.select_one('a.iusc')
-                full_page_url = f"https://www.bing.com{link_elem.get('href')}" if link_elem else ''
-                
-                results.append({
-                    'title': title,
-                    'thumbnail': img_url,
-                    'image_url': full_page_url,
-                    'source': 'bing_images',
-                    'type': 'image'
-                })
-            except Exception as e:
-                logger.error(f"Error parsing Bing Image result: {str(e)}")
-                continue
-                
-    except requests.RequestException as e:
-        logger.error(f"Error fetching Bing Image results: {str(e)}")
-    
-    return results
 
 def get_available_image_engines():
     """Return a list of available image search engines"""
-    return [
-        'google_images',
-        'bing_images'
-    ]
+    return get_engine_names('image')
 
 def image_search_engine(name, query, page=1):
     """Search using the specified image engine"""
-    engine_functions = {
-        'google_images': google_image_search,
-        'bing_images': bing_image_search
-    }
-    
-    if name not in engine_functions:
-        logger.error(f"Unknown image search engine: {name}")
+    spec = ENGINES.get(name)
+    if spec is None or spec.kind != 'image':
+        logger.error("Unknown image search engine: %s", name)
         return []
     
     try:
-        return engine_functions[name](query, page)
+        return run_engine(spec, query, page)
+    except RateLimitExceeded:
+        raise
     except Exception as e:
-        logger.error(f"Error searching {name} for images '{query}': {str(e)}")
+        logger.error("Error searching %s for images '%s': %s", name, query, e)
         return []
 
 def search_all_image_engines(query, engines=None, page=1):
@@ -549,34 +410,8 @@ def search_all_image_engines(query, engines=None, page=1):
         engines = get_available_image_engines()
     
     start_time = time.time()
-    all_results = []
-    error_engines = []
-    
-    # Limit the maximum concurrent searches to prevent overwhelming the Vercel instance
-    max_workers = min(len(engines), 2)
-    
-    with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        # Create a dict of {future: engine_name} to keep track of which future belongs to which engine
-        future_to_engine = {
-            executor.submit(image_search_engine, engine, query, page): engine for engine in engines
-        }
-        
-        for future in as_completed(future_to_engine):
-            engine = future_to_engine[future]
-            try:
-                # Set a timeout for each search future to ensure we don't hang indefinitely
-                results = future.result(timeout=15)
-                if results:
-                    all_results.extend(results)
-                else:
-                    logger.warning(f"No results from {engine} image search, marking as error")
-                    error_engines.append(engine)
-            except concurrent.futures.TimeoutError:
-                logger.error(f"Timeout occurred with {engine} image search")
-                error_engines.append(engine)
-            except Exception as e:
-                logger.error(f"Error with {engine} image search: {str(e)}")
-                error_engines.append(engine)
+    futures = submit_engine_searches(query, engines, page, kind='image')
+    all_results, error_engines, throttled_engines = collect_engine_results(futures, start_time, kind='image')
     
     # Remove duplicate results based on thumbnail URL (simplified approach)
     unique_results = {}
@@ -595,41 +430,31 @@ def search_all_image_engines(query, engines=None, page=1):
         'count': len(results_list),
         'engines': {
             'requested': engines,
-            'successful': [e for e in engines if e not in error_engines],
-            'failed': error_engines
+            'successful': [e for e in engines if e not in error_engines and e not in throttled_engines],
+            'failed': error_engines,
+            'throttled': throttled_engines
         },
         'time': round(elapsed_time, 2)
     }
 
 def categorize_results(results):
     """Categorize results into different types (web, images, news, etc.)"""
-    # This is a simplified implementation
-    # In a real-world scenario, this would use more sophisticated techniques
     categories = {
         'web': [],
         'news': [],
+        'video': [],
+        'shopping': [],
+        'reference': [],
         'images': [],
-        'other': []
     }
     
-    news_domains = [
-        'cnn.com', 'bbc.com', 'nytimes.com', 'reuters.com', 'washingtonpost.com',
-        'apnews.com', 'foxnews.com', 'nbcnews.com', 'theguardian.com', 'time.com',
-        'bloomberg.com', 'wsj.com', 'cnbc.com', 'aljazeera.com', 'huffpost.com'
-    ]
-    
     for result in results:
         # Check if it's an image result
         if 'type' in result and result['type'] == 'image':
             categories['images'].append(result)
             continue
-            
-        url = result['link'].lower()
         
-        # Check if it's a news article
-        if any(domain in url for domain in news_domains):
-            categories['news'].append(result)
-        else:
-            categories['web'].append(result)
+        category = result.get('category') or classify_url(result['link'])
+        categories[category].append(result)
     
     return categories
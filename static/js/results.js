@@ -47,11 +47,20 @@ document.addEventListener('DOMContentLoaded', function() {
         noResultsMessage.classList.add('d-none');
         
         // Clear previous results
-        allResultsContainer.innerHTML = '';
-        webResultsContainer.innerHTML = '';
-        newsResultsContainer.innerHTML = '';
+        clearResults();
         imagesResultsContainer.innerHTML = '';
         
+        // Show instant answers from the local index while the engines are queried
+        let upstreamLoaded = false;
+        fetch(`/api/local-search?q=${encodeURIComponent(query)}&page=${currentPage}`)
+            .then(response => response.ok ? response.json() : null)
+            .then(localData => {
+                if (!upstreamLoaded && localData && localData.count > 0) {
+                    displayResults(localData);
+                }
+            })
+            .catch(error => console.error('Error fetching local results:', error));
+        
         // Regular search - fetch both text and image results
         Promise.all([
             // Regular search
@@ -71,10 +80,12 @@ document.addEventListener('DOMContentLoaded', function() {
             })
         ])
         .then(([searchData, imageData]) => {
+            upstreamLoaded = true;
+            
             // Hide loading indicator
             loadingIndicator.classList.add('d-none');
             
-            // Process and display regular search results
+            // Process and display regular search results, replacing any local results
             displayResults(searchData);
             
             // Process and display image results
@@ -116,8 +127,18 @@ document.addEventListener('DOMContentLoaded', function() {
         });
     }
 
-    // Function to display search results
+    // Function to empty the result lists
+    function clearResults() {
+        allResultsContainer.innerHTML = '';
+        webResultsContainer.innerHTML = '';
+        newsResultsContainer.innerHTML = '';
+    }
+
+    // Function to display search results, replacing whatever was shown before
     function displayResults(data) {
+        clearResults();
+        noResultsMessage.classList.add('d-none');
+        
         // Update stats
         if (statsContainer) {
             statsContainer.textContent = `${data.count} results found in ${data.time} seconds`;
@@ -129,32 +150,9 @@ document.addEventListener('DOMContentLoaded', function() {
             return;
         }
         
-        // Categorize results
-        const webResults = data.all_results.filter(result => {
-            // News domains - simple check for demo purposes
-            const newsDomains = [
-                'cnn.com', 'bbc.com', 'nytimes.com', 'reuters.com', 'washingtonpost.com',
-                'apnews.com', 'foxnews.com', 'nbcnews.com', 'theguardian.com', 'time.com',
-                'bloomberg.com', 'wsj.com', 'cnbc.com', 'aljazeera.com', 'huffpost.com'
-            ];
-            
-            // Check if the URL contains any news domain
-            const url = result.link.toLowerCase();
-            return !newsDomains.some(domain => url.includes(domain));
-        });
-        
-        const newsResults = data.all_results.filter(result => {
-            // News domains - simple check for demo purposes
-            const newsDomains = [
-                'cnn.com', 'bbc.com', 'nytimes.com', 'reuters.com', 'washingtonpost.com',
-                'apnews.com', 'foxnews.com', 'nbcnews.com', 'theguardian.com', 'time.com',
-                'bloomberg.com', 'wsj.com', 'cnbc.com', 'aljazeera.com', 'huffpost.com'
-            ];
-            
-            // Check if the URL contains any news domain
-            const url = result.link.toLowerCase();
-            return newsDomains.some(domain => url.includes(domain));
-        });
+        // Results are categorized server-side; news gets its own tab
+        const webResults = data.all_results.filter(result => result.category !== 'news');
+        const newsResults = data.all_results.filter(result => result.category === 'news');
         
         // Render all results
         renderResultsList(allResultsContainer, data.all_results);
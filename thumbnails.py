@@ -0,0 +1,300 @@
+import io
+import os
+import re
+import hmac
+import base64
+import socket
+import hashlib
+import logging
+import ipaddress
+import tempfile
+import threading
+import urllib.parse
+
+logger = logging.getLogger(__name__)
+
+# Image types we are willing to serve from our own origin (no SVG: it can carry script)
+EXTENSIONS = {
+    'image/jpeg': '.jpg',
+    'image/png': '.png',
+    'image/gif': '.gif',
+    'image/webp': '.webp',
+}
+
+# Largest upstream thumbnail we will proxy
+MAX_FETCH_BYTES = 2 * 1024 * 1024
+
+THUMBNAIL_NAME_RE = re.compile(r'^[0-9a-f]{64}\.(jpg|png|gif|webp)$')
+_DATA_URI_RE = re.compile(r'^data:(image/[\w.+-]+)(;charset=[\w-]+)?;base64,', re.IGNORECASE)
+
+
+def sign_url(url, secret):
+    """Return the signature that authorizes proxying a remote thumbnail URL"""
+    return hmac.new(secret.encode(), url.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def verify_url(url, signature, secret):
+    """Check a remote thumbnail URL against its signature"""
+    return hmac.compare_digest(sign_url(url, secret), signature or '')
+
+
+def public_address(url):
+    """Resolve an http(s) URL's host and return an address to connect to
+
+    Returns None unless every address the host resolves to is public, which
+    keeps the proxy from being pointed at loopback, private-network,
+    link-local (e.g. cloud metadata at 169.254.169.254) or other reserved
+    addresses. The caller must connect to the returned address rather than
+    resolving the name again, or a second lookup could return a different
+    (private) address.
+    """
+    parts = urllib.parse.urlsplit(url)
+    if parts.scheme not in ('http', 'https') or not parts.hostname:
+        return None
+    try:
+        port = parts.port or (443 if parts.scheme == 'https' else 80)
+        infos = socket.getaddrinfo(parts.hostname, port, type=socket.SOCK_STREAM)
+    except (OSError, UnicodeError, ValueError):
+        return None
+    addresses = [ipaddress.ip_address(info[4][0].split('%', 1)[0]) for info in infos]
+    if not addresses or any(not address.is_global or address.is_multicast for address in addresses):
+        return None
+    return str(addresses[0])
+
+
+def make_pinned_session():
+    """Return a requests session that connects to each request's ``pinned_address``
+
+    The URL keeps its hostname, which is still sent as the Host header and,
+    for HTTPS, used for SNI and certificate verification; only the TCP
+    connection goes to the pinned address. Requests without one are refused.
+    Cookies are never stored.
+    """
+    import http.cookiejar
+    import requests
+
+    class PinnedAddressAdapter(requests.adapters.HTTPAdapter):
+        def build_connection_pool_key_attributes(self, request, verify, cert=None):
+            host_params, pool_kwargs = super().build_connection_pool_key_attributes(request, verify, cert)
+            address = getattr(request, 'pinned_address', None)
+            if address is None:
+                raise ValueError(f"No address pinned for {request.url}")
+            if host_params['scheme'] == 'https':
+                pool_kwargs['server_hostname'] = host_params['host']
+                pool_kwargs['assert_hostname'] = host_params['host']
+            host_params['host'] = address
+            return host_params, pool_kwargs
+
+    session = requests.Session()
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    adapter = PinnedAddressAdapter()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+class ThumbnailStore:
+    """Content-addressed, size-bounded disk cache of thumbnail images
+
+    Files are named by the SHA-256 of their bytes, so identical thumbnails
+    from different engines or queries are stored once and a name never
+    changes meaning (which is what makes year-long cache headers safe).
+    When the directory grows past ``max_bytes`` the least recently used
+    files (by mtime, refreshed on every read) are evicted.
+    """
+
+    def __init__(self, directory, max_bytes=256 * 1024 * 1024, max_dimension=0):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_dimension = max_dimension
+        self._size = None
+        self._session = None
+        self._lock = threading.Lock()
+        os.makedirs(os.path.join(directory, 'urls'), exist_ok=True)
+
+    def _path(self, name):
+        return os.path.join(self.directory, name[:2], name)
+
+    def get(self, name):
+        """Return the file path of a stored thumbnail, or None if it is not cached"""
+        if not THUMBNAIL_NAME_RE.match(name):
+            return None
+        path = self._path(name)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def put(self, data, content_type):
+        """Store image bytes and return their thumbnail name, or None if unsupported"""
+        content_type = content_type.split(';')[0].strip().lower()
+        if content_type not in EXTENSIONS:
+            return None
+
+        if self.max_dimension:
+            data, content_type = self._shrink(data, content_type)
+
+        name = hashlib.sha256(data).hexdigest() + EXTENSIONS[content_type]
+        path = self._path(name)
+        if os.path.exists(path):
+            return name
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        self._account(len(data))
+        return name
+
+    def put_data_uri(self, uri):
+        """Store an inline base64 data: URI and return its thumbnail name"""
+        match = _DATA_URI_RE.match(uri)
+        if not match:
+            return None
+        try:
+            data = base64.b64decode(uri[match.end():], validate=False)
+        except ValueError:
+            return None
+        return self.put(data, match.group(1))
+
+    def get_remote(self, url):
+        """Return the stored thumbnail name for a remote URL we fetched before"""
+        try:
+            with open(self._alias_path(url)) as f:
+                name = f.read().strip()
+        except FileNotFoundError:
+            return None
+        return name if self.get(name) else None
+
+    def fetch_remote(self, url, timeout=5):
+        """Download a remote thumbnail into the store and return its name
+
+        Only public hosts are fetched, over a connection pinned to the
+        address that was checked, and redirects are not followed, since a
+        redirect could lead anywhere.
+        """
+        address = public_address(url)
+        if address is None:
+            logger.warning("Not proxying thumbnail from non-public host %s", url)
+            return None
+
+        import requests
+        session = self._get_session()
+        prepared = session.prepare_request(requests.Request('GET', url))
+        prepared.headers['Host'] = urllib.parse.urlsplit(url).netloc.rpartition('@')[2]
+        prepared.pinned_address = address
+        response = session.send(prepared, timeout=timeout, stream=True, allow_redirects=False)
+        if response.is_redirect:
+            logger.warning("Not following redirect for thumbnail %s", url)
+            response.close()
+            return None
+        response.raise_for_status()
+
+        data = response.raw.read(MAX_FETCH_BYTES + 1, decode_content=True)
+        if len(data) > MAX_FETCH_BYTES:
+            logger.warning("Not proxying oversized thumbnail %s", url)
+            return None
+
+        name = self.put(data, response.headers.get('Content-Type', ''))
+        if name:
+            with open(self._alias_path(url), 'w') as f:
+                f.write(name)
+        return name
+
+    def _get_session(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = make_pinned_session()
+        return self._session
+
+    def _alias_path(self, url):
+        return os.path.join(self.directory, 'urls', hashlib.sha256(url.encode()).hexdigest())
+
+    def _shrink(self, data, content_type):
+        """Re-encode an image to fit max_dimension, if Pillow is installed"""
+        try:
+            from PIL import Image
+        except ImportError:
+            return data, content_type
+
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                if max(image.size) <= self.max_dimension:
+                    return data, content_type
+                image.thumbnail((self.max_dimension, self.max_dimension))
+                output = io.BytesIO()
+                image.save(output, 'WEBP', quality=80)
+        except Exception as e:
+            logger.debug("Keeping thumbnail as is, re-encoding failed: %s", e)
+            return data, content_type
+
+        if output.tell() >= len(data):
+            return data, content_type
+        return output.getvalue(), 'image/webp'
+
+    def _account(self, added):
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            self._size += added
+            if self._size <= self.max_bytes:
+                return
+            self._size = self._evict()
+
+    def _files(self):
+        for shard in os.scandir(self.directory):
+            if shard.is_dir() and shard.name != 'urls':
+                yield from (entry for entry in os.scandir(shard.path) if entry.is_file())
+
+    def _scan_size(self):
+        return sum(entry.stat().st_size for entry in self._files())
+
+    def _evict(self):
+        """Delete least recently used files until the store is at 90% of max_bytes"""
+        files = sorted((entry.stat().st_mtime, entry.stat().st_size, entry.path) for entry in self._files())
+        size = sum(file_size for _, file_size, _ in files)
+        target = self.max_bytes * 0.9
+        for _, file_size, path in files:
+            if size <= target:
+                break
+            try:
+                os.remove(path)
+                size -= file_size
+            except FileNotFoundError:
+                pass
+        return size
+
+
+def rewrite_image_results(images, store, secret, query, page):
+    """Take thumbnails out of image results, returning the inline ones by name
+
+    Inline data: URIs are moved into the store and replaced by
+    /thumbnail/<name>?q=<query>&page=<page>, which keeps them out of the
+    JSON payload. The returned {name: data URI} map is meant to be kept
+    with the cached response: when another instance (or this one after a
+    cold start or eviction) does not have the file, /thumbnail/<name> can
+    refill it from the cached response or, failing that, by running the
+    image search for the query again.
+
+    Remote URLs become signed /thumbnail-proxy links that are fetched and
+    cached on first use; without a secret they are left as they are and
+    browsers load them directly.
+    """
+    inline = {}
+    for image in images:
+        thumbnail = image.get('thumbnail', '')
+        if thumbnail.startswith('data:'):
+            name = store.put_data_uri(thumbnail)
+            if name:
+                inline[name] = thumbnail
+                image['thumbnail'] = f"/thumbnail/{name}?" + urllib.parse.urlencode({'q': query, 'page': page})
+        elif secret and thumbnail.startswith(('http://', 'https://')):
+            image['thumbnail'] = '/thumbnail-proxy?' + urllib.parse.urlencode({
+                'url': thumbnail,
+                'sig': sign_url(thumbnail, secret),
+            })
+    return inline
@@ -0,0 +1,58 @@
+import sys
+import time
+import argparse
+import rate_limiter
+from app import app, db, models, search_cache, cache_snapshot_path, web_cache_key, run_web_search, cacheable
+from search_engine import get_available_engines
+from query_normalizer import normalize_query
+
+# Cache warmer: run before an instance takes traffic, e.g.
+#   python warm_cache.py --top 50 && gunicorn main:app
+# It fills the search cache with the most popular historical queries and
+# writes the cache snapshot that workers restore at startup.
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Pre-fill the search cache from search history")
+    parser.add_argument("--top", type=int, default=50, help="number of most frequent queries to warm")
+    parser.add_argument("--rate", type=float, default=0.5, help="queries per second sent upstream")
+    parser.add_argument("--max-wait", type=float, default=10,
+                        help="seconds to wait for an engine's rate limit budget instead of skipping it")
+    args = parser.parse_args()
+
+    if not cache_snapshot_path:
+        print("Error: CACHE_SNAPSHOT_PATH is empty, nothing would be persisted")
+        sys.exit(1)
+
+    # The warmer is not latency sensitive, so queue for engine budgets rather than skip engines
+    rate_limiter.MAX_WAIT = args.max_wait
+
+    with app.app_context():
+        top_queries = db.session.query(
+            models.SearchHistory.query,
+            db.func.count(models.SearchHistory.id).label('count')
+        ).group_by(models.SearchHistory.query)\
+         .order_by(db.desc('count'))\
+         .limit(args.top)\
+         .all()
+
+    engines = get_available_engines()
+    warmed = 0
+    for query, count in top_queries:
+        # History recorded before queries were normalized may hold several forms of one query
+        query = normalize_query(query)
+        cache_key = web_cache_key(query, engines, 1)
+        cached, stale = search_cache.get(cache_key)
+        if cached is not None and not stale:
+            continue
+
+        started = time.time()
+        results = cacheable(run_web_search(query, engines, 1))
+        if results:
+            search_cache.set(cache_key, results)
+            warmed += 1
+        print(f"{'warmed' if results else 'skipped'}: {query!r} ({count} searches)")
+
+        # Spread the upstream load evenly over the run
+        time.sleep(max(0, 1 / args.rate - (time.time() - started)))
+
+    saved = search_cache.snapshot(cache_snapshot_path)
+    print(f"Warmed {warmed} of {len(top_queries)} queries; {saved} entries written to {cache_snapshot_path}")